@@ -0,0 +1,102 @@
+"""
+JSON 后端基准测试：在临时目录中生成若干个 nekobox 分组文件，
+分别用标准库 json 和 orjson（已安装时）计时写入和读取，并检查两者输出是否逐字节相同。
+使用方法：python benchmarks/bench_json.py [分组数 ...]，默认 10000 50000
+"""
+import contextlib
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from copyreading import EntryStore, GroupIdAllocator, list_group_files, write_nekobox_json, write_results  # noqa: E402
+from copyreading import jsonio  # noqa: E402
+from copyreading.pipeline import load_existing_urls  # noqa: E402
+from copyreading.sinks import make_nekobox_group  # noqa: E402
+
+
+def make_store(count):
+    """含中文名称和各种查询参数的样例条目"""
+    store = EntryStore()
+    ids = [store.add(f"机场{i} 🚀", f"https://sub{i}.example.com/api/v1/client/subscribe?token={i:032x}&flag=clash")
+           for i in range(count)]
+    return store, ids
+
+
+def digest(paths):
+    """按文件名顺序计算所有文件内容的摘要，用于比较不同后端的输出"""
+    h = hashlib.sha256()
+    for path in sorted(paths):
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def bench_backend(backend, store, ids):
+    """返回 {项目: 秒数} 和输出摘要"""
+    jsonio.set_backend(backend)
+    timings = {}
+    # 分组文件的写入时间主要花在创建文件上，单独统计序列化本身
+    groups = [make_nekobox_group(i, store.names[i], store.urls[i]) for i in ids]
+    start = time.perf_counter()
+    for group in groups:
+        jsonio.dumps(group, indent=4)
+    timings['序列化分组（不含文件操作）'] = time.perf_counter() - start
+    start = time.perf_counter()
+    for text in [jsonio.dumps(group, indent=4) for group in groups]:
+        jsonio.loads(text)
+    timings['解析分组（不含文件操作）'] = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, 'pm.json'), 'w', encoding='utf-8') as f:
+            f.write('{"groups": [0]}')
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+            allocator = GroupIdAllocator.load(directory)
+            start = time.perf_counter()
+            write_nekobox_json(store.iter_entries(ids), directory=directory, allocator=allocator)
+            timings['写入分组文件和 pm.json'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            write_results(store, ids, ids[:len(ids) // 10], directory)
+            timings['写入 suc.jpg/fa.jpg'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            existing = load_existing_urls('nekobox', directory)
+            timings['读取分组文件（外部去重）'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            GroupIdAllocator.load(directory)
+            timings['读取 pm.json'] = time.perf_counter() - start
+
+        assert len(existing) == len(ids)
+        paths = list_group_files(directory)
+        paths += [os.path.join(directory, name) for name in ('pm.json', 'suc.jpg', 'fa.jpg')]
+        return timings, digest(paths)
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10000, 50000]
+    backends = ['json'] + (['orjson'] if jsonio.orjson is not None else [])
+    if len(backends) == 1:
+        print("未安装 orjson，只测试标准库 json（pip install orjson 后可对比）。")
+
+    for count in counts:
+        store, ids = make_store(count)
+        results = {backend: bench_backend(backend, store, ids) for backend in backends}
+        print(f"\n===== {count} 个分组 =====")
+        for label in results['json'][0]:
+            line = "  ".join(f"{backend} {results[backend][0][label]:.3f} 秒" for backend in backends)
+            if len(backends) > 1:
+                line += f"  ({results['json'][0][label] / results['orjson'][0][label]:.1f}x)"
+            print(f"[基准] {label}: {line}")
+        if len(backends) > 1:
+            same = results['json'][1] == results['orjson'][1]
+            print(f"[检查] 两种后端的输出{'逐字节相同' if same else '不一致！'}")
+    jsonio.set_backend()
+
+
+if __name__ == '__main__':
+    main()
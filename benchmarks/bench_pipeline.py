@@ -0,0 +1,104 @@
+"""
+流程各阶段的基准测试，在临时目录中生成样例数据后计时。
+使用方法：python benchmarks/bench_pipeline.py [条目数]
+"""
+import contextlib
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from copyreading import (  # noqa: E402
+    GroupIdAllocator,
+    build_store,
+    canonicalize_entries,
+    deduplicate_with_existing,
+    extract_subscriptions_from_files,
+    write_nekobox_json,
+    write_results,
+)
+
+
+def make_corpus(directory, count):
+    """生成混合格式的TXT样例，约 1/10 的条目重复"""
+    with open(os.path.join(directory, 'emoji.txt'), 'w', encoding='utf-8') as f:
+        for i in range(count // 2):
+            f.write(f"📋 机场名称: 机场{i % (count // 4 or 1)}\n🔗 订阅链接: https://sub{i}.example.com/api?token={i}\n\n")
+    with open(os.path.join(directory, 'urls.txt'), 'w', encoding='utf-8') as f:
+        for i in range(count - count // 2):
+            f.write(f"https://host{i % (count // 10 or 1)}.example.org/link/{i}?clash=1\n")
+    with open(os.path.join(directory, 'pm.json'), 'w', encoding='utf-8') as f:
+        f.write('{"groups": [0]}')
+
+
+def timed(label, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    print(f"[基准] {label}: {time.perf_counter() - start:.3f} 秒")
+    return result
+
+
+def peak_memory(func):
+    """用 tracemalloc 记录函数执行期间的内存峰值，返回 (结果, 峰值字节数, 结果占用的字节数)"""
+    tracemalloc.start()
+    try:
+        result = func()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak, retained
+
+
+def dict_path(directory):
+    """旧流程：每个阶段都复制一份 dict 列表"""
+    entries = extract_subscriptions_from_files(directory)
+    entries = deduplicate_with_existing(canonicalize_entries(entries), 'nekobox', directory)
+    return [{'name': entry['name'], 'url': entry['url']} for entry in entries]
+
+
+def store_path(directory):
+    """新流程：条目只保存在 EntryStore 中，阶段间传递 id"""
+    return build_store('nekobox', directory)
+
+
+def bench_allocator(directory, count):
+    """pm.json 中已有 count 个分组时，读取一次并分配 count 个新 ID"""
+    with open(os.path.join(directory, 'pm.json'), 'w', encoding='utf-8') as f:
+        f.write('{"groups": [%s]}' % ','.join(str(i) for i in range(0, count * 2, 2)))
+    allocator = timed("读取 pm.json 并扫描分组文件", GroupIdAllocator.load, directory)
+    timed(f"分配 {count} 个 ID", lambda: [allocator.allocate() for _ in range(count)])
+    print(f"[基准] 已用区间 {len(allocator.starts)} 个")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as directory:
+        make_corpus(directory, count)
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+            formatted, dict_peak, dict_retained = peak_memory(lambda: dict_path(directory))
+            dict_count = len(formatted)
+            del formatted
+            (store, ids), store_peak, store_retained = peak_memory(lambda: store_path(directory))
+        print(f"[内存] dict 列表 ({dict_count} 条): 峰值 {dict_peak / 1024 / 1024:.1f} MB，"
+              f"结果占用 {dict_retained / 1024 / 1024:.1f} MB")
+        print(f"[内存] EntryStore ({len(ids)} 条): 峰值 {store_peak / 1024 / 1024:.1f} MB，"
+              f"结果占用 {store_retained / 1024 / 1024:.1f} MB")
+
+        store, ids = timed("提取+规范化+去重", build_store, 'nekobox', directory)
+        timed("写入 suc.jpg", write_results, store, ids, None, directory)
+        # 写入分组文件时逐条打印，基准测试中屏蔽输出
+        start = time.perf_counter()
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+            write_nekobox_json(store.iter_entries(ids), directory=directory)
+        elapsed = time.perf_counter() - start
+        print(f"[基准] 写入 nekobox 分组 ({len(ids)} 个): {elapsed:.3f} 秒")
+
+    with tempfile.TemporaryDirectory() as directory:
+        bench_allocator(directory, count)
+
+
+if __name__ == '__main__':
+    main()
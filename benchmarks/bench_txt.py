@@ -0,0 +1,103 @@
+"""
+TXT 解析基准测试：在几种混合格式的样例文本上比较旧的三遍正则解析和新的单遍解析，
+输出吞吐量（MB/s）和识别到的条目数。
+旧解析在第一种格式有匹配时不再查找其余格式，条目数不同的样例中两者的工作量并不相同。
+使用方法：python benchmarks/bench_txt.py [每个样例的大致 MB 数]，默认 8
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from copyreading import get_base_domain, parse_txt_content  # noqa: E402
+from copyreading.sources import TXT_PATTERN, _txt_entries  # noqa: E402
+
+# 改动前的三个正则，依次尝试，前一个没有匹配才运行下一个
+legacy_pattern1 = re.compile(r'📋\s*机场名称:\s*(.+)\n🔗\s*订阅链接:\s*(.+)', re.MULTILINE)
+legacy_pattern2 = re.compile(r'机场名称:\s*(.+)\n订阅链接:\s*(.+)', re.MULTILINE)
+legacy_pattern3 = re.compile(r'https?://[^\s]+', re.MULTILINE)
+
+
+def legacy_parse(content):
+    for pattern in (legacy_pattern1, legacy_pattern2):
+        matches = pattern.findall(content)
+        if matches:
+            return [{'name': name.strip(), 'url': url.strip()} for name, url in matches]
+    return [{'name': get_base_domain(url), 'url': url} for url in legacy_pattern3.findall(content)]
+
+
+def finditer_parse(content):
+    """单遍正则但不用 str.find 跳过说明文字，用于比较跳过带来的差别"""
+    return _txt_entries(TXT_PATTERN.finditer(content))
+
+
+def emoji_block(i):
+    return f"📋 机场名称: 机场{i}\n🔗 订阅链接: https://sub{i}.example.com/api/v1/client/subscribe?token={i:x}\n"
+
+
+def plain_block(i):
+    return f"机场名称: 节点{i}\n订阅链接: https://node{i}.example.net/link/{i}?clash=1\n"
+
+
+def url_block(i):
+    return f"https://host{i}.example.org/s/{i}?sub=2\n"
+
+
+def noise_block(i):
+    return f"第 {i} 行：本频道每日更新免费节点，仅供学习交流使用，请勿用于非法用途。\n\n"
+
+
+CORPORA = {
+    '混合格式': (emoji_block, plain_block, url_block, noise_block),
+    '以说明文字为主': (noise_block,) * 9 + (emoji_block,),
+    '偶尔有链接': (noise_block,) * 199 + (emoji_block, url_block),
+    '仅链接': (url_block,),
+    '仅带表情符号': (emoji_block,),
+}
+
+
+def make_corpus(blocks, size):
+    rng = random.Random(0)
+    parts = []
+    total = 0
+    i = 0
+    while total < size:
+        part = rng.choice(blocks)(i)
+        parts.append(part)
+        total += len(part.encode('utf-8'))
+        i += 1
+    return ''.join(parts)
+
+
+def throughput(func, content, size, repeat=3):
+    """返回 (MB/s, 条目数)，取多次中最快的一次"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = sum(1 for _ in func(content))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return size / 1024 / 1024 / best, count
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 8
+    size = int(megabytes * 1024 * 1024)
+    for label, blocks in CORPORA.items():
+        content = make_corpus(blocks, size)
+        actual = len(content.encode('utf-8'))
+        print(f"\n===== {label}（{actual / 1024 / 1024:.1f} MB）=====")
+        for name, func in (
+            ("旧：三遍正则", legacy_parse),
+            ("单遍（不跳过）", finditer_parse),
+            ("新：单遍", parse_txt_content),
+        ):
+            speed, count = throughput(func, content, actual)
+            print(f"[基准] {name}: {speed:.1f} MB/s，{count} 条")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+"""
+批量导入订阅的公共实现，main.py、33含验证.py、37不含验证.py 共用。
+
+流程：读取输入源 -> 规范化 -> 去重 -> 可选验证 -> 写入 nekobox/singbox。
+验证模块依赖 requests 和 PySocks，需要时请从 copyreading.validate 导入。
+"""
+from .common import PM_FILE, SINGBOX_FILE, get_base_domain, list_files, list_group_files, open_output
+from .sources import (
+    CONTAINERS,
+    READERS,
+    extract_subscriptions_from_files,
+    iter_stream_entries,
+    iter_subscriptions,
+    parse_txt_content,
+    register_container,
+    register_reader,
+)
+from .ids import GroupIdAllocator
+from .store import EntryStore, entry_key, url_key
+from .pipeline import (
+    build_store,
+    canonicalize_entries,
+    deduplicate_entries,
+    deduplicate_with_existing,
+    load_existing_urls,
+    run_pipeline,
+)
+from .sinks import SINKS, dump_json_array, dump_json_lines, get_next_id, write_nekobox_json, write_singbox_yaml, write_results
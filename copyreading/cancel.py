@@ -0,0 +1,96 @@
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+
+class CancelToken:
+    """
+    验证过程共享的取消标记：到达截止时间或收到中断信号后，
+    不再发起新的请求，并关闭已登记的会话。关闭会话只会释放空闲连接，
+    已在等待响应的请求要到超时才会结束，因此验证在守护线程中进行，调用方不必等待它们。
+    """
+    __slots__ = ('deadline', 'reason', '_event', '_lock', '_sessions')
+
+    def __init__(self, deadline=None):
+        # deadline 为 time.monotonic() 的时间点
+        self.deadline = deadline
+        self.reason = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._sessions = set()
+
+    @classmethod
+    def with_budget(cls, seconds=None):
+        return cls(None if seconds is None else time.monotonic() + seconds)
+
+    def cancel(self, reason="已取消"):
+        """标记取消并关闭所有已登记的会话，可重复调用"""
+        with self._lock:
+            if self.reason is None:
+                self.reason = reason
+            self._event.set()
+            sessions = list(self._sessions)
+            self._sessions.clear()
+        for session in sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
+
+    def cancelled(self):
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("已到达时间限制")
+            return True
+        return False
+
+    def remaining(self, default=None):
+        """距截止时间的秒数，没有截止时间时返回 default"""
+        if self.deadline is None:
+            return default
+        return max(0.0, self.deadline - time.monotonic())
+
+    def register(self, session):
+        """登记会话，取消时会被关闭；已取消时立即关闭并返回 False"""
+        with self._lock:
+            if not self._event.is_set():
+                self._sessions.add(session)
+                return True
+        session.close()
+        return False
+
+    def unregister(self, session):
+        with self._lock:
+            self._sessions.discard(session)
+
+
+@contextmanager
+def cancel_on_signal(token, signals=(signal.SIGINT, signal.SIGTERM)):
+    """
+    在代码块内将 Ctrl-C/SIGTERM 转为取消 token，以便已得到的结果还能正常写出。
+    第二次 Ctrl-C 恢复默认行为，立即中断。只能在主线程中使用。
+    """
+    if threading.current_thread() is not threading.main_thread():
+        yield token
+        return
+
+    previous = {}
+
+    def handler(signum, frame):
+        if token.cancelled() and signum == signal.SIGINT:
+            raise KeyboardInterrupt
+        print("\n收到中断信号，正在停止验证并保存已得到的结果……（再次按 Ctrl-C 立即退出）")
+        token.cancel("用户中断")
+
+    for signum in signals:
+        try:
+            previous[signum] = signal.signal(signum, handler)
+        except (ValueError, OSError):
+            pass
+    try:
+        yield token
+    finally:
+        for signum, old_handler in previous.items():
+            signal.signal(signum, old_handler)
@@ -0,0 +1,89 @@
+import argparse
+
+from .profiling import PROFILE_DIR, PROFILE_MODES, StageProfiler
+
+
+def build_parser(description, results=True):
+    """
+    三个脚本共用的命令行参数，不带参数运行时与原来的交互方式一致。
+    results 为 False 时不提供结果文件格式选项（main.py 不写入 suc/fa 结果文件）。
+    """
+    parser = argparse.ArgumentParser(description=description)
+    output = parser.add_argument_group('输出选项')
+    if results:
+        output.add_argument('--results-format', choices=('json', 'jsonl'), default='json',
+                            help="结果文件格式：json 写入 suc.jpg/fa.jpg，jsonl 逐行写入 suc.jsonl/fa.jsonl")
+    output.add_argument('--compress', choices=('gzip', 'zstd'),
+                        help="压缩 jsonl 结果文件和分组合集文件（zstd 需要 pip install zstandard）")
+    output.add_argument('--shard-size', type=int, metavar='N',
+                        help="nekobox 分组文件每 N 个放入一个 shard_XXXX 子目录")
+    output.add_argument('--bundle', metavar='PATH',
+                        help="将 nekobox 分组合并写入单个 JSONL 合集文件，不逐个创建文件")
+
+    profiling = parser.add_argument_group('性能分析选项')
+    profiling.add_argument('--profile', nargs='?', const=PROFILE_DIR, metavar='DIR',
+                           help=f"按阶段（读取提取、去重、验证、写入）记录耗时、cProfile 和内存分配，文件保存到 DIR（默认 {PROFILE_DIR}）")
+    profiling.add_argument('--profile-mode', choices=PROFILE_MODES, default='all',
+                           help="all 同时记录 cProfile 和内存分配；cpu/memory 只记录其一；time 只统计耗时")
+    return parser
+
+
+def add_validation_arguments(parser):
+    """33含验证.py 的验证参数"""
+    validation = parser.add_argument_group('验证选项')
+    validation.add_argument('--time-budget', type=float, metavar='SECONDS',
+                            help="验证的总时间限制（秒），到期后按已得到的结果输出；条目按历史成功率等优先级排序")
+    validation.add_argument('--no-priority', action='store_true',
+                            help="不按优先级排序，按读取顺序验证")
+
+    distributed = parser.add_argument_group('分布式验证选项')
+    distributed.add_argument('--coordinator', metavar='HOST:PORT',
+                             help="作为协调端在该地址监听，由各验证端（python -m copyreading.distributed）领取条目验证")
+    distributed.add_argument('--authkey', help="协调端与验证端共用的密钥，不指定时随机生成并打印")
+    distributed.add_argument('--local-workers', type=int, default=0, metavar='N',
+                             help="在本机启动 N 个验证端进程")
+    distributed.add_argument('--expect-workers', type=int, metavar='N',
+                             help="等待 N 个验证端连接后才判定完成，默认等于 --local-workers（至少 1）")
+    distributed.add_argument('--batch-size', type=int, default=50, metavar='N',
+                             help="验证端每次领取的条目数")
+    distributed.add_argument('--connect-timeout', type=float, default=300, metavar='SECONDS',
+                             help="等待验证端连接的最长秒数，到期后用已连接的验证端开始")
+    return parser
+
+
+def parse_args(parser, argv=None):
+    """解析参数并检查取值"""
+    args = parser.parse_args(argv)
+    if args.shard_size is not None and args.shard_size <= 0:
+        parser.error("--shard-size 必须为正整数")
+    if args.bundle is not None and args.shard_size is not None:
+        parser.error("--bundle 与 --shard-size 不能同时使用：合集文件不按子目录分片")
+    if args.compress is not None and args.bundle is None and getattr(args, 'results_format', None) != 'jsonl':
+        parser.error("--compress 只压缩 jsonl 结果文件和 --bundle 合集文件，"
+                     "请同时指定 --results-format jsonl 或 --bundle")
+    if getattr(args, 'time_budget', None) is not None and args.time_budget <= 0:
+        parser.error("--time-budget 必须为正数")
+    if getattr(args, 'coordinator', None) is None and getattr(args, 'local_workers', 0):
+        parser.error("--local-workers 需要与 --coordinator 一起使用")
+    if getattr(args, 'batch_size', 1) <= 0:
+        parser.error("--batch-size 必须为正整数")
+    if getattr(args, 'connect_timeout', 1) <= 0:
+        parser.error("--connect-timeout 必须为正数")
+    return args
+
+
+def results_options(args):
+    """write_results 的参数"""
+    return {'results_format': args.results_format, 'compress': args.compress}
+
+
+def nekobox_options(args):
+    """write_nekobox_json 的参数"""
+    return {'shard_size': args.shard_size, 'bundle': args.bundle, 'compress': args.compress}
+
+
+def make_profiler(args):
+    """指定 --profile 时返回 StageProfiler，否则返回 None"""
+    if args.profile is None:
+        return None
+    return StageProfiler(args.profile, args.profile_mode)
@@ -0,0 +1,88 @@
+import gzip
+import io
+import os
+from urllib.parse import urlparse
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+PM_FILE = 'pm.json'
+SINGBOX_FILE = 'subscribes.yaml'
+# 各主机历次验证的成功/失败次数，用于安排验证顺序
+HISTORY_FILE = 'host_history.json'
+# 分片存放 nekobox 分组文件时的子目录前缀，例如 shard_0000/
+SHARD_PREFIX = 'shard_'
+COMPRESS_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+# jsonl 结果文件，读取输入时跳过，避免把上一次的结果当成新的订阅
+RESULT_FILES = tuple(
+    f"{base_name}.jsonl{suffix}"
+    for base_name in ('suc', 'fa', 'unchecked')
+    for suffix in ('',) + tuple(COMPRESS_SUFFIXES.values())
+)
+
+
+def get_base_domain(url):
+    """从URL中提取主域名，用于没有明确名称的情况"""
+    try:
+        parsed_url = urlparse(url)
+        # 提取域名部分
+        domain = parsed_url.netloc
+        if domain:
+            return domain
+        else:
+            # 处理没有 scheme 的 URL
+            parts = url.strip('/').split('/')
+            if len(parts) >= 2:
+                return parts[1]
+            return parts[0]
+    except Exception as e:
+        print(f"提取域名时发生错误: {e}")
+        return ""
+
+
+def list_files(directory='.', suffixes=None, exclude=()):
+    """列出目录下符合后缀的文件，只扫描一次目录"""
+    result = []
+    for file_name in sorted(os.listdir(directory)):
+        if file_name in exclude:
+            continue
+        if suffixes is None or file_name.lower().endswith(tuple(suffixes)):
+            result.append(os.path.join(directory, file_name) if directory != '.' else file_name)
+    return result
+
+
+def shard_dir_name(group_id, shard_size):
+    """分组 ID 所在的分片目录名"""
+    return f"{SHARD_PREFIX}{group_id // shard_size:04d}"
+
+
+def list_group_files(directory='.'):
+    """列出现有的 nekobox 分组文件，包括分片子目录中的文件"""
+    result = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith('.json') and entry.name not in (PM_FILE, HISTORY_FILE):
+                result.append(entry.path)
+            elif entry.is_dir() and entry.name.startswith(SHARD_PREFIX):
+                with os.scandir(entry.path) as shard_entries:
+                    result.extend(item.path for item in shard_entries if item.name.endswith('.json'))
+    return sorted(result)
+
+
+def open_output(path, compress=None):
+    """
+    打开文本输出文件，compress 为 'gzip' 或 'zstd' 时边写边压缩，并自动追加后缀。
+    返回 (文件对象, 实际路径)。
+    """
+    if compress is None:
+        return open(path, 'w', encoding='utf-8'), path
+    path += COMPRESS_SUFFIXES[compress]
+    if compress == 'gzip':
+        return gzip.open(path, 'wt', encoding='utf-8'), path
+    if zstandard is None:
+        raise ImportError("缺少 zstandard，请使用 pip install zstandard 安装")
+    raw = open(path, 'wb')
+    writer = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+    return io.TextIOWrapper(writer, encoding='utf-8'), path
@@ -0,0 +1,338 @@
+"""
+分布式验证：协调端把去重后的条目放到任务板上，通过 socket 提供给多台机器上的验证端。
+
+验证端每次领取一批条目，验证后回报结果。任何一个验证端验证成功即视为成功；
+失败的条目会交给尚未尝试过的其他验证端再试，全部验证端都失败才算失败。
+
+验证端启动方式：
+    python -m copyreading.distributed --connect 协调端地址:端口 --authkey 密钥 [--threads 8] [--proxies ...]
+"""
+import argparse
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from collections import defaultdict, deque
+from multiprocessing.managers import BaseManager
+
+from .cancel import CancelToken, cancel_on_signal
+from .store import EntryStore, new_id_array
+from .validate import UNCHECKED_REASON, validate_entries
+
+# 验证端超过这么多秒没有任何请求，视为已离线，它领取的条目重新排队
+LEASE_TIMEOUT = 120
+# 等待验证端连接的最长秒数，到期后用已连接的验证端开始
+CONNECT_TIMEOUT = 300
+# 验证端没有可领取的条目时的等待间隔
+POLL_INTERVAL = 0.5
+
+
+class JobBoard:
+    """协调端进程内的任务板，所有方法都会被验证端通过 socket 远程调用"""
+
+    def __init__(self, entries, batch_size=50, expected_workers=1, lease_timeout=LEASE_TIMEOUT,
+                 connect_timeout=CONNECT_TIMEOUT):
+        # entries 为 {全局 id: (名称, 链接)}，按优先级顺序排列
+        self._lock = threading.Lock()
+        self.entries = entries
+        self.batch_size = batch_size
+        self.expected_workers = expected_workers
+        self.lease_timeout = lease_timeout
+        self.connect_deadline = time.monotonic() + connect_timeout
+        # 验证端数量只是开始判断完成的条件，达到一次之后不再要求
+        self.started = False
+        self.pending = deque(entries)
+        self.tried = defaultdict(set)
+        self.succeeded = {}
+        self.reasons = {}
+        self.leases = {}
+        self.workers = {}
+        self.closed = False
+
+    def register(self, worker):
+        """登记验证端，返回离线判定的秒数，验证端据此安排心跳"""
+        with self._lock:
+            self.workers[worker] = time.monotonic()
+        print(f"验证端 {worker} 已连接，当前共 {len(self.workers)} 个。")
+        return self.lease_timeout
+
+    def take(self, worker):
+        """领取一批未被该验证端尝试过的条目；返回 None 表示已全部完成，空列表表示稍后再试"""
+        with self._lock:
+            self._touch(worker)
+            self._expire()
+            if self.closed or self._finished():
+                return None
+
+            # 上一批未回报就来领取，说明上一批已被放弃
+            self._requeue(worker)
+            batch = []
+            skipped = []
+            while self.pending and len(batch) < self.batch_size:
+                entry_id = self.pending.popleft()
+                if worker in self.tried[entry_id]:
+                    skipped.append(entry_id)
+                else:
+                    batch.append(entry_id)
+            self.pending.extendleft(reversed(skipped))
+
+            if batch:
+                self.leases[worker] = batch
+            return [(entry_id,) + self.entries[entry_id] for entry_id in batch]
+
+    def report(self, worker, ok_ids, failed, unchecked_ids):
+        """回报一批结果：failed 为 [(id, 失败原因)]，unchecked_ids 重新排队且不计为尝试"""
+        with self._lock:
+            self._touch(worker)
+            self.leases.pop(worker, None)
+            for entry_id in ok_ids:
+                self.succeeded.setdefault(entry_id, worker)
+            for entry_id, reason in failed:
+                if entry_id in self.succeeded:
+                    continue
+                self.tried[entry_id].add(worker)
+                self.reasons[entry_id] = reason
+                self.pending.append(entry_id)
+            self.pending.extendleft(reversed(unchecked_ids))
+
+    def heartbeat(self, worker):
+        """验证端处理较大批次时定期调用，避免被判定为离线"""
+        with self._lock:
+            self._touch(worker)
+
+    def finished(self):
+        with self._lock:
+            self._expire()
+            return self._finished()
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+
+    def progress(self):
+        with self._lock:
+            return len(self.succeeded), len(self.reasons), len(self.workers)
+
+    def _touch(self, worker):
+        self.workers[worker] = time.monotonic()
+
+    def _requeue(self, worker):
+        batch = self.leases.pop(worker, None)
+        if batch:
+            self.pending.extendleft(reversed(batch))
+
+    def _expire(self):
+        now = time.monotonic()
+        for worker, last_seen in list(self.workers.items()):
+            if now - last_seen > self.lease_timeout:
+                print(f"验证端 {worker} 超过 {self.lease_timeout} 秒无响应，视为离线。")
+                del self.workers[worker]
+                self._requeue(worker)
+
+    def _finished(self):
+        if not self.started:
+            if len(self.workers) >= self.expected_workers:
+                self.started = True
+            elif time.monotonic() >= self.connect_deadline:
+                self.started = True
+                print(f"等待验证端超时，只有 {len(self.workers)} 个已连接，将以现有验证端完成验证。")
+            else:
+                return False
+        if self.leases:
+            return False
+        # 只要求在线的验证端都尝试过；验证端全部离线时结束，未尝试的条目计为未验证
+        active = set(self.workers)
+        return all(
+            entry_id in self.succeeded or self.tried[entry_id] >= active
+            for entry_id in self.pending
+        )
+
+
+class BoardManager(BaseManager):
+    pass
+
+
+def parse_address(text):
+    """'host:port' -> (host, port)"""
+    host, _, port = text.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def run_coordinator(store, ids, address, authkey, expected_workers=1, local_workers=0, batch_size=50,
+                    token=None, num_threads=8, proxies_list=None, connect_timeout=CONNECT_TIMEOUT,
+                    lease_timeout=LEASE_TIMEOUT):
+    """
+    启动任务板并等待验证端完成，返回 (成功 id, 失败 id, 未验证 id)，失败原因记录在 store.reasons 中。
+    local_workers 大于 0 时在本机启动对应数量的验证端进程。
+    等待 connect_timeout 秒仍不足 expected_workers 个验证端时，用已连接的验证端开始。
+    """
+    board = JobBoard(
+        {entry_id: (store.names[entry_id], store.urls[entry_id]) for entry_id in ids},
+        batch_size=batch_size,
+        expected_workers=max(expected_workers, 1),
+        lease_timeout=lease_timeout,
+        connect_timeout=connect_timeout,
+    )
+    BoardManager.register('get_board', callable=lambda: board)
+    manager = BoardManager(address=address, authkey=authkey)
+    server = manager.get_server()
+    # 各连接的处理线程（Server.serve_client）在 stop_event 置位后退出
+    server.stop_event = threading.Event()
+    threading.Thread(target=_serve, args=(server,), daemon=True).start()
+    print(f"协调端已在 {address[0]}:{address[1]} 上等待 {board.expected_workers} 个验证端，共 {len(ids)} 个条目。")
+
+    processes = []
+    connect_address = _local_address(server.address)
+    for index in range(local_workers):
+        process = multiprocessing.Process(
+            target=run_worker,
+            args=(connect_address, authkey, f"local-{index}", num_threads, proxies_list),
+        )
+        process.start()
+        processes.append(process)
+
+    token = CancelToken() if token is None else token
+    last_report = 0
+    while not board.finished() and not token.cancelled():
+        time.sleep(POLL_INTERVAL)
+        if time.monotonic() - last_report >= 10:
+            succeeded, failed, workers = board.progress()
+            print(f"[协调端] 成功 {succeeded}，已有失败记录 {failed}，在线验证端 {workers}。")
+            last_report = time.monotonic()
+
+    finished = board.finished()
+    board.close()
+    for process in processes:
+        process.join(timeout=lease_timeout if finished else 5)
+        if process.is_alive():
+            process.terminate()
+    _stop(server)
+
+    final_ids = []
+    failed_ids = []
+    unchecked_ids = []
+    active = set(board.workers)
+    for entry_id in ids:
+        tried = board.tried[entry_id]
+        if entry_id in board.succeeded:
+            final_ids.append(entry_id)
+        elif tried and (finished or tried >= active):
+            # 正常结束，或提前结束时所有在线验证端都已尝试过
+            failed_ids.append(entry_id)
+            store.reasons[entry_id] = board.reasons.get(entry_id, '')
+        else:
+            unchecked_ids.append(entry_id)
+            store.reasons[entry_id] = UNCHECKED_REASON
+    return new_id_array(sorted(final_ids)), new_id_array(sorted(failed_ids)), new_id_array(sorted(unchecked_ids))
+
+
+def _local_address(address):
+    """本机连接监听地址时使用的地址"""
+    return ('127.0.0.1' if address[0] in ('', '0.0.0.0') else address[0], address[1])
+
+
+def _serve(server):
+    """
+    接受验证端连接，代替 Server.serve_forever：
+    后者结束时在线程中调用 sys.exit(0) 并重置 sys.stdout/sys.stderr。
+    """
+    while True:
+        try:
+            connection = server.listener.accept()
+        except OSError:
+            if server.stop_event.is_set():
+                return
+            continue
+        if server.stop_event.is_set():
+            connection.close()
+            return
+        threading.Thread(target=server.handle_request, args=(connection,), daemon=True).start()
+
+
+def _stop(server):
+    """停止接受连接并关闭监听端口，自己连接一次以唤醒阻塞在 accept 中的线程"""
+    server.stop_event.set()
+    try:
+        socket.create_connection(_local_address(server.address), timeout=1).close()
+    except OSError:
+        pass
+    server.listener.close()
+
+
+def run_worker(address, authkey, name=None, num_threads=8, proxies_list=None):
+    """连接协调端，循环领取、验证并回报，直到协调端表示已完成"""
+    name = name or f"{socket.gethostname()}-{os.getpid()}"
+    BoardManager.register('get_board')
+    manager = BoardManager(address=address, authkey=authkey)
+    try:
+        manager.connect()
+        board = manager.get_board()
+        lease_timeout = board.register(name)
+    except (OSError, EOFError) as e:
+        print(f"[{name}] 连接协调端 {address[0]}:{address[1]} 失败：{e}")
+        return
+
+    with cancel_on_signal(CancelToken()) as token:
+        while not token.cancelled():
+            try:
+                batch = board.take(name)
+            except (OSError, EOFError) as e:
+                print(f"[{name}] 与协调端的连接已断开：{e}")
+                break
+            if batch is None:
+                break
+            if not batch:
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            store = EntryStore()
+            global_ids = []
+            local_ids = new_id_array()
+            for entry_id, entry_name, url in batch:
+                local_id = store.add(entry_name, url)
+                if local_id is not None:
+                    local_ids.append(local_id)
+                    global_ids.append(entry_id)
+
+            stop_heartbeat = threading.Event()
+            threading.Thread(target=_heartbeat, args=(board, name, stop_heartbeat, lease_timeout / 4), daemon=True).start()
+            try:
+                ok_ids, failed_ids, unchecked_ids = validate_entries(store, local_ids, proxies_list, num_threads, token)
+            finally:
+                stop_heartbeat.set()
+            try:
+                board.report(
+                    name,
+                    [global_ids[i] for i in ok_ids],
+                    [(global_ids[i], store.reasons.get(i, '')) for i in failed_ids],
+                    [global_ids[i] for i in unchecked_ids],
+                )
+            except (OSError, EOFError) as e:
+                print(f"[{name}] 回报结果失败：{e}")
+                break
+    print(f"[{name}] 验证端已退出。")
+
+
+def _heartbeat(board, name, stop_event, interval):
+    while not stop_event.wait(interval):
+        try:
+            board.heartbeat(name)
+        except (OSError, EOFError):
+            return
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="分布式验证的验证端，连接 33含验证.py --coordinator 启动的协调端")
+    parser.add_argument('--connect', required=True, metavar='HOST:PORT', help="协调端地址")
+    parser.add_argument('--authkey', required=True, help="与协调端相同的密钥")
+    parser.add_argument('--name', help="验证端名称，默认为 主机名-进程号")
+    parser.add_argument('--threads', type=int, default=8, help="验证线程数")
+    parser.add_argument('--proxies', default='', help="代理地址，多个用英文逗号分隔，仅在直接访问失败时使用")
+    args = parser.parse_args(argv)
+    proxies_list = [p.strip() for p in args.proxies.split(',') if p.strip()]
+    run_worker(parse_address(args.connect), args.authkey.encode('utf-8'), args.name, args.threads, proxies_list)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+import bisect
+import json
+import os
+
+from . import jsonio
+from .common import PM_FILE, list_group_files
+
+# 每次向区间集合申请的连续 ID 数量
+BLOCK_SIZE = 1024
+
+
+class GroupIdAllocator:
+    """
+    nekobox 分组 ID 分配器：pm.json 只读一次，已用 ID 保存为有序的不相交区间 [start, end)。
+    磁盘上已存在但未登记在 pm.json 中的 {id}.json 通过一次目录扫描计入已用，不会被覆盖。
+    """
+    __slots__ = ('directory', 'pm_data', 'starts', 'ends', '_block', 'orphan_ids')
+
+    def __init__(self, directory='.', pm_data=None, used_ids=()):
+        self.directory = directory
+        self.pm_data = pm_data
+        self.starts = []
+        self.ends = []
+        self._block = iter(())
+        self.orphan_ids = []
+        for group_id in sorted(set(used_ids)):
+            self.mark_used(group_id)
+
+    @classmethod
+    def load(cls, directory='.', required=False):
+        """
+        读取 pm.json 和现有分组文件，建立分配器。
+        required 为 True 时，pm.json 缺失或无法解析返回 None。
+        """
+        pm_file_path = os.path.join(directory, PM_FILE)
+        print(f"正在读取文件：{PM_FILE}")
+        pm_data = None
+        groups = []
+        if not os.path.exists(pm_file_path):
+            if required:
+                print("错误：未找到 pm.json 文件。请确保文件存在。")
+                return None
+            print("警告：未找到 pm.json 文件，将从 ID 0 开始。")
+        else:
+            try:
+                pm_data = jsonio.load_path(pm_file_path)
+            except (OSError, json.JSONDecodeError) as e:
+                if required:
+                    print(f"读取或解析 pm.json 时发生错误：{e}")
+                    return None
+                print(f"读取或解析 pm.json 时发生错误：{e}，将从 ID 0 开始。")
+            if pm_data is not None:
+                raw_groups = pm_data.get('groups') if isinstance(pm_data, dict) else None
+                if isinstance(raw_groups, list) and raw_groups:
+                    groups = [item for item in raw_groups if isinstance(item, int) and not isinstance(item, bool)]
+                    if not groups:
+                        print("警告：pm.json 的 'groups' 列表为空或不包含有效数字，将从 ID 0 开始。")
+                else:
+                    print("警告：pm.json 文件中 'groups' 键不存在或格式不正确，将从 ID 0 开始。")
+
+        allocator = cls(directory, pm_data, groups)
+
+        # 一次目录扫描找出磁盘上已有的分组文件
+        registered = set(groups)
+        for file_path in list_group_files(directory):
+            stem = os.path.basename(file_path)[:-len('.json')]
+            if stem.isdigit() and int(stem) not in registered:
+                allocator.orphan_ids.append(int(stem))
+                allocator.mark_used(int(stem))
+        if allocator.orphan_ids:
+            print(f"警告：发现 {len(allocator.orphan_ids)} 个未登记在 pm.json 中的分组文件，对应 ID 不会被覆盖。")
+        return allocator
+
+    def is_used(self, group_id):
+        index = bisect.bisect_right(self.starts, group_id) - 1
+        return index >= 0 and group_id < self.ends[index]
+
+    def mark_used(self, group_id):
+        """将单个 ID 标记为已用，与相邻区间合并"""
+        self.mark_range_used(group_id, group_id + 1)
+
+    def mark_range_used(self, start, end):
+        """将 [start, end) 标记为已用，与重叠或相邻的区间合并"""
+        left = bisect.bisect_left(self.ends, start)
+        right = bisect.bisect_right(self.starts, end)
+        if left < right:
+            start = min(start, self.starts[left])
+            end = max(end, self.ends[right - 1])
+        self.starts[left:right] = [start]
+        self.ends[left:right] = [end]
+
+    def next_free(self):
+        """最大已用 ID 之后的第一个 ID，与原来的 max(groups) + 1 一致"""
+        return self.ends[-1] if self.ends else 0
+
+    def gaps(self):
+        """已用区间之间的空闲区间列表"""
+        return [(self.ends[i], self.starts[i + 1]) for i in range(len(self.starts) - 1)]
+
+    def reserve(self, count, reuse_gaps=False):
+        """
+        预留 count 个连续 ID，返回 range。
+        reuse_gaps 为 True 时优先使用足够大的空闲区间，否则总在最大已用 ID 之后分配。
+        """
+        start = self.next_free()
+        if reuse_gaps:
+            for gap_start, gap_end in self.gaps():
+                if gap_end - gap_start >= count:
+                    start = gap_start
+                    break
+        self.mark_range_used(start, start + count)
+        return range(start, start + count)
+
+    def allocate(self):
+        """逐个取出 ID，每次按 BLOCK_SIZE 预留一段"""
+        group_id = next(self._block, None)
+        if group_id is None:
+            self._block = iter(self.reserve(BLOCK_SIZE))
+            group_id = next(self._block)
+        return group_id
+
+    def commit(self, new_ids):
+        """将成功写入的分组 ID 追加到 pm.json，使用已读入的内容，不再重新读取"""
+        if not new_ids:
+            print("\n没有新的分组需要添加，pm.json 未更新。")
+            return
+        if not isinstance(self.pm_data, dict):
+            print(f"\n更新 pm.json 时发生错误：{PM_FILE} 不存在或格式不正确。")
+            return
+        # 确保 pm_data['groups'] 是一个列表
+        if not isinstance(self.pm_data.get('groups'), list):
+            self.pm_data['groups'] = []
+        self.pm_data['groups'].extend(new_ids)
+        try:
+            with open(os.path.join(self.directory, PM_FILE), 'w', encoding='utf-8') as pm_file:
+                jsonio.dump(self.pm_data, pm_file, indent=4)
+            print(f"\npm.json 文件已更新，添加了 {len(new_ids)} 个新的分组 ID。")
+        except Exception as e:
+            print(f"\n更新 pm.json 时发生错误：{e}")
@@ -0,0 +1,97 @@
+"""
+JSON 读写后端：安装了 orjson 时使用 orjson，否则使用标准库 json。
+
+输出与 json.dumps(obj, ensure_ascii=False, indent=...) 逐字节相同，NekoBox 读取的
+{id}.json、pm.json 以及 suc.jpg/fa.jpg 不会因为后端不同而变化。
+唯一的差别是指数形式的浮点数（1e+16 与 1e16）和 NaN，本项目写出的数据中没有这类值。
+orjson 无法处理的内容（超过 64 位的整数、非字符串键、NaN 字面量等）会自动交给标准库。
+
+设置环境变量 COPYREADING_JSON=json 可强制使用标准库。
+"""
+import json
+import os
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND_ENV = 'COPYREADING_JSON'
+BACKENDS = ('orjson', 'json')
+# orjson 只支持 2 空格缩进，按行首空格数放大到所需缩进；JSON 字符串中的换行都已转义，行首空格只可能是缩进
+_LEADING_SPACES = re.compile(r'^ +', re.MULTILINE)
+
+_backend = 'json'
+
+
+def set_backend(name=None):
+    """切换后端，name 为 None 时按环境变量和是否安装 orjson 自动选择；返回实际使用的后端"""
+    global _backend
+    if name is None:
+        name = os.environ.get(BACKEND_ENV) or ('orjson' if orjson is not None else 'json')
+    if name not in BACKENDS:
+        raise ValueError(f"未知的 JSON 后端：{name}，可选 {', '.join(BACKENDS)}")
+    if name == 'orjson' and orjson is None:
+        raise ImportError("缺少 orjson，请使用 pip install orjson 安装")
+    _backend = name
+    return _backend
+
+
+def get_backend():
+    return _backend
+
+
+def loads(data):
+    """解析 str 或 bytes"""
+    if _backend == 'orjson':
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # 交给标准库，保持与原来相同的容错范围和错误信息
+            pass
+    return json.loads(data)
+
+
+def load(f):
+    """从已打开的文件读取并解析"""
+    return loads(f.read())
+
+
+def load_path(path):
+    """按二进制读取文件并解析，省去文本解码"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def dumps(obj, indent=None, compact=False):
+    """
+    序列化为 str，结果与 json.dumps(obj, ensure_ascii=False, indent=indent) 相同。
+    compact=True 时不带缩进且分隔符后没有空格，与 separators=(',', ':') 相同，适合 JSON Lines。
+    """
+    if _backend == 'orjson' and (indent is None and compact or indent and indent % 2 == 0):
+        try:
+            if compact and indent is None:
+                return orjson.dumps(obj).decode('utf-8')
+            text = orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8')
+        except TypeError:
+            pass
+        else:
+            if indent == 2:
+                return text
+            scale = indent // 2
+            return _LEADING_SPACES.sub(lambda m: m.group(0) * scale, text)
+    if compact and indent is None:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+    return json.dumps(obj, ensure_ascii=False, indent=indent)
+
+
+def dump(obj, f, indent=None, compact=False):
+    """序列化后写入已打开的文本文件"""
+    f.write(dumps(obj, indent, compact))
+
+
+try:
+    set_backend()
+except (ValueError, ImportError) as e:
+    print(f"{e}，将使用标准库 json。")
@@ -0,0 +1,139 @@
+import os
+
+from . import jsonio
+from .common import SINGBOX_FILE, get_base_domain, list_group_files
+from .profiling import profile_stage
+from .singbox import SubscribeIndex, load_subscribes
+from .sinks import SINKS, UPSERT_SINKS, write_results
+from .sources import INPUT_EXCLUDE, iter_subscriptions
+from .store import EntryStore, new_id_array, url_key
+
+
+def canonicalize_entries(entries):
+    """统一条目格式：去除首尾空白，补全缺失的名称，丢弃空链接"""
+    for entry in entries:
+        url = (entry.get('url') or '').strip()
+        if not url:
+            continue
+        name = (entry.get('name') or '').strip() or get_base_domain(url)
+        if not name:
+            continue
+        yield {'name': name, 'url': url}
+
+
+def deduplicate_entries(entries, verbose=False):
+    """第一步内部去重：跳过名称和链接完全相同的条目"""
+    processed_entries = set()
+    for entry in entries:
+        key = (entry['name'], entry['url'])
+        if key in processed_entries:
+            if verbose:
+                print(f"跳过完全重复条目：名称='{entry['name']}', 订阅链接='{entry['url']}'")
+            continue
+        processed_entries.add(key)
+        yield entry
+
+
+def load_existing_urls(choice, directory='.', key=None):
+    """读取现有配置中已存在的订阅链接，提供 key 时保存 key(url) 而不是链接本身"""
+    existing_urls = set()
+    add_url = existing_urls.add if key is None else lambda url: existing_urls.add(key(url))
+
+    if choice == 'nekobox':
+        for file_name in list_group_files(directory):
+            try:
+                data = jsonio.load_path(file_name)
+                if isinstance(data, dict) and 'url' in data:
+                    add_url(data['url'].strip())
+            except Exception as e:
+                print(f"读取现有 JSON 文件 {file_name} 时发生错误：{e}")
+
+    elif choice == 'singbox':
+        _, records = load_subscribes(os.path.join(directory, SINGBOX_FILE))
+        for proxy in records:
+            if isinstance(proxy, dict) and isinstance(proxy.get('url'), str):
+                add_url(proxy['url'].strip())
+
+    return existing_urls
+
+
+def deduplicate_with_existing(entries, choice, directory='.'):
+    """根据用户选择，进行第二步外部去重"""
+    existing_urls = load_existing_urls(choice, directory)
+    return [entry for entry in deduplicate_entries(entries) if entry['url'] not in existing_urls]
+
+
+def build_store(choice, directory='.', suffixes=None, external_dedup=True, store=None, profiler=None,
+                existing_ids=None, existing_keys=None):
+    """
+    读取、规范化并去重，条目只在 EntryStore 中保存一次。
+    返回 (store, 去重后的 id 数组)。
+    提供 existing_ids（id 数组）时，链接已存在于现有配置中的条目追加到其中，而不是直接丢弃。
+    existing_keys 为现有链接的 url_key 集合，为 None 时按 choice 读取现有配置。
+    """
+    store = EntryStore() if store is None else store
+    # 目标为 singbox 时 subscribes.yaml 是要合并的配置，不能同时作为输入，否则其中的旧名称会覆盖新名称
+    exclude = INPUT_EXCLUDE + (SINGBOX_FILE,) if choice == 'singbox' else INPUT_EXCLUDE
+    entries = canonicalize_entries(iter_subscriptions(directory, suffixes, exclude))
+    if profiler is not None:
+        # 平时边读边去重；性能分析时先读完，读取和去重才能分开统计
+        with profiler.stage('extraction'):
+            entries = list(entries)
+    with profile_stage(profiler, 'dedup'):
+        ids = store.extend(entries, verbose=not external_dedup)
+        if external_dedup and ids:
+            if existing_keys is None:
+                existing_keys = load_existing_urls(choice, directory, key=url_key)
+            if existing_ids is None:
+                ids = store.exclude_urls(ids, existing_keys)
+            else:
+                ids, existing = store.split_urls(ids, existing_keys)
+                existing_ids.extend(existing)
+    return store, ids
+
+
+def run_pipeline(choice, directory='.', suffixes=None, validator=None, external_dedup=True, sink_options=None,
+                 results_options=None, profiler=None):
+    """
+    串联完整流程：读取 -> 规范化 -> 去重 -> 可选验证 -> 写入结果和目标配置。
+    validator 接收 (store, 去重后的 id 数组)，返回 (成功 id, 失败 id, 未验证 id)；
+    验证被中断时只要返回已得到的结果，后续写入照常进行。
+    sink_options/results_options 分别传给目标配置写入函数和 write_results。
+    提供 profiler（StageProfiler）时按阶段统计，验证阶段由 validator 自行标记，以免把交互输入算进去。
+    目标配置在 UPSERT_SINKS 中时，链接已存在的条目不经过验证，直接交给写入函数更新名称。
+    返回 (store, 成功 id, 失败 id)。
+    """
+    existing_ids = new_id_array() if choice in UPSERT_SINKS else None
+    existing_keys = None
+    if choice == 'singbox':
+        # subscribes.yaml 只解析一次，去重和合并共用同一个索引
+        sink_options = dict(sink_options or {})
+        index = SubscribeIndex.load(os.path.join(directory, SINGBOX_FILE), sink_options.get('full_record', True))
+        sink_options['index'] = index
+        existing_keys = {url_key(url) for url in index.by_url}
+    store, unique_ids = build_store(choice, directory, suffixes, external_dedup, profiler=profiler,
+                                    existing_ids=existing_ids, existing_keys=existing_keys)
+    if not len(store):
+        print("\n所有文件中未找到任何新的分组信息。")
+        return store, [], []
+
+    if not unique_ids:
+        if existing_ids:
+            print("\n所有新订阅已存在于现有配置文件中，只检查已有订阅的名称。")
+            with profile_stage(profiler, 'writers'):
+                SINKS[choice](store.iter_entries(existing_ids), directory=directory, **(sink_options or {}))
+        else:
+            print("\n所有新订阅已存在于现有配置文件中，无需添加。")
+        return store, [], []
+
+    if validator is None:
+        print(f"\n去重后共找到 {len(unique_ids)} 个独立订阅链接。")
+        final_ids, failed_ids, unchecked_ids = unique_ids, None, None
+    else:
+        final_ids, failed_ids, unchecked_ids = validator(store, unique_ids)
+
+    with profile_stage(profiler, 'writers'):
+        write_results(store, final_ids, failed_ids, directory, unchecked_ids=unchecked_ids, **(results_options or {}))
+        sink_ids = final_ids if not existing_ids else list(final_ids) + list(existing_ids)
+        SINKS[choice](store.iter_entries(sink_ids), directory=directory, **(sink_options or {}))
+    return store, final_ids, failed_ids if failed_ids is not None else []
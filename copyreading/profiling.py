@@ -0,0 +1,143 @@
+"""
+分阶段性能分析：--profile 时对读取提取、去重、验证、写入各阶段分别记录
+耗时、cProfile 统计和 tracemalloc 内存分配，结束后输出汇总。
+
+每个阶段在输出目录中生成：
+    {阶段}.prof        cProfile 统计，可用 python -m pstats 或 snakeviz 查看
+    {阶段}.alloc.txt   该阶段结束时按代码行汇总的内存分配最多的位置
+"""
+import cProfile
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+PROFILE_DIR = 'profile'
+PROFILE_MODES = ('all', 'cpu', 'memory', 'time')
+STAGE_LABELS = {
+    'extraction': '读取提取',
+    'dedup': '去重',
+    'validation': '验证',
+    'writers': '写入',
+}
+# 每个阶段保存的内存分配位置数量
+TOP_ALLOCATIONS = 30
+
+
+def format_bytes(size):
+    for unit in ('B', 'KB', 'MB'):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{size} B"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class StageProfiler:
+    """按阶段收集耗时、cProfile 和 tracemalloc 数据；同一阶段多次进入时耗时累加"""
+
+    def __init__(self, output_dir=PROFILE_DIR, mode='all'):
+        self.output_dir = output_dir
+        self.cpu = mode in ('all', 'cpu')
+        self.memory = mode in ('all', 'memory')
+        # {阶段: [耗时秒数, 内存峰值增量]}，按首次进入的顺序
+        self.stages = {}
+        if self.cpu or self.memory:
+            os.makedirs(output_dir, exist_ok=True)
+
+    @contextmanager
+    def stage(self, name):
+        profiles = []
+        previous_hook = None
+        if self.cpu:
+            profiles.append(cProfile.Profile())
+            if sys.version_info < (3, 12):
+                # 3.12 之前 cProfile 只记录启用它的线程，为阶段内新建的线程（验证线程池）各启用一个
+                previous_hook = threading.getprofile()
+                threading.setprofile(lambda *_: self._profile_thread(profiles))
+
+        started_tracing = False
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+
+        start = time.perf_counter()
+        if profiles:
+            profiles[0].enable()
+        try:
+            yield
+        finally:
+            if profiles:
+                profiles[0].disable()
+                threading.setprofile(previous_hook)
+            elapsed = time.perf_counter() - start
+
+            peak = None
+            if self.memory:
+                _, peak = tracemalloc.get_traced_memory()
+                peak -= baseline
+                self._dump_allocations(name, tracemalloc.take_snapshot())
+                if started_tracing:
+                    tracemalloc.stop()
+
+            if profiles:
+                self._dump_profiles(name, profiles)
+
+            totals = self.stages.setdefault(name, [0.0, None])
+            totals[0] += elapsed
+            if peak is not None:
+                totals[1] = max(totals[1] or 0, peak)
+
+    @staticmethod
+    def _profile_thread(profiles):
+        # 在新线程的第一次调用事件中启用，cProfile 随即替换掉这个钩子
+        profile = cProfile.Profile()
+        profiles.append(profile)
+        profile.enable()
+
+    def _dump_profiles(self, name, profiles):
+        import pstats
+
+        path = os.path.join(self.output_dir, f"{name}.prof")
+        try:
+            pstats.Stats(*profiles).dump_stats(path)
+        except Exception as e:
+            print(f"保存 {path} 时发生错误：{e}")
+
+    def _dump_allocations(self, name, snapshot):
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        path = os.path.join(self.output_dir, f"{name}.alloc.txt")
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+                    f.write(f"{stat}\n")
+        except Exception as e:
+            print(f"保存 {path} 时发生错误：{e}")
+
+    def report(self):
+        """打印各阶段按耗时和内存峰值的排名"""
+        if not self.stages:
+            return
+        total = sum(elapsed for elapsed, _ in self.stages.values()) or 1
+        print("\n===== 性能分析汇总 =====")
+        print("按耗时排序：")
+        for name, (elapsed, _) in sorted(self.stages.items(), key=lambda item: -item[1][0]):
+            print(f"  {STAGE_LABELS.get(name, name)}：{elapsed:.3f} 秒（{elapsed / total:.0%}）")
+        if self.memory:
+            print("按内存峰值（相对阶段开始时）排序：")
+            for name, (_, peak) in sorted(self.stages.items(), key=lambda item: -(item[1][1] or 0)):
+                print(f"  {STAGE_LABELS.get(name, name)}：{format_bytes(peak or 0)}")
+        if self.cpu or self.memory:
+            print(f"各阶段的 .prof 和 .alloc.txt 文件已保存到 {self.output_dir} 目录。")
+
+
+def profile_stage(profiler, name):
+    """profiler 为 None 时不做任何记录"""
+    return nullcontext() if profiler is None else profiler.stage(name)
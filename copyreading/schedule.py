@@ -0,0 +1,162 @@
+import ipaddress
+import json
+import os
+from array import array
+from collections import defaultdict
+
+from .common import HISTORY_FILE
+from .store import KeyIndex, new_id_array, url_key
+
+# 评分权重：历史成功率为主，带“机场名称”标签的条目和信誉较好的域名次之
+LABEL_BONUS = 0.2
+IP_HOST_PENALTY = 0.1
+
+
+def load_host_history(directory='.'):
+    """读取各主机历次验证的 [成功次数, 失败次数]，文件不存在时返回空字典"""
+    history_path = os.path.join(directory, HISTORY_FILE)
+    if not os.path.exists(history_path):
+        return {}
+    try:
+        with open(history_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception as e:
+        print(f"读取 {HISTORY_FILE} 时发生错误：{e}，将不使用历史记录。")
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {host: counts for host, counts in data.items() if isinstance(counts, list) and len(counts) == 2}
+
+
+def update_host_history(store, final_ids, failed_ids, directory='.', history=None):
+    """将本次验证结果累加到历史记录并写回文件"""
+    history = load_host_history(directory) if history is None else history
+    for ids, index in ((final_ids, 0), (failed_ids, 1)):
+        for entry_id in ids:
+            counts = history.setdefault(store.hosts[entry_id], [0, 0])
+            counts[index] += 1
+    try:
+        with open(os.path.join(directory, HISTORY_FILE), 'w', encoding='utf-8') as f:
+            json.dump(history, f, ensure_ascii=False)
+    except Exception as e:
+        print(f"写入 {HISTORY_FILE} 时发生错误：{e}")
+
+
+def parent_domain(host):
+    """去掉端口和最左一级子域名，sub.example.com -> example.com"""
+    host = host.rsplit(':', 1)[0] if host.count(':') == 1 else host
+    parts = host.split('.')
+    return '.'.join(parts[-2:]) if len(parts) > 2 else host
+
+
+def is_ip_host(host):
+    host = host.rsplit(':', 1)[0] if host.count(':') == 1 else host
+    try:
+        ipaddress.ip_address(host.strip('[]'))
+        return True
+    except ValueError:
+        return False
+
+
+def success_rate(counts):
+    """带平滑的成功率，没有记录时为 0.5"""
+    success, failure = counts
+    return (success + 1) / (success + failure + 2)
+
+
+def domain_reputation(history):
+    """按上级域名汇总历史记录，作为同一服务商下新子域名的信誉"""
+    totals = defaultdict(lambda: [0, 0])
+    for host, (success, failure) in history.items():
+        counts = totals[parent_domain(host)]
+        counts[0] += success
+        counts[1] += failure
+    return dict(totals)
+
+
+def host_score(host, history, reputation):
+    """主机的基础分数：有历史记录时为成功率，否则取上级域名的信誉，IP 地址扣分"""
+    if host in history:
+        score = success_rate(history[host])
+    else:
+        score = success_rate(reputation.get(parent_domain(host), (0, 0)))
+    if is_ip_host(host):
+        score -= IP_HOST_PENALTY
+    return score
+
+
+def score_entry(store, entry_id, history, reputation):
+    """条目的优先级分数，越高越先验证"""
+    score = host_score(store.hosts[entry_id], history, reputation)
+    # 名称不是主机名，说明来自“机场名称”标签而不是裸链接
+    if store.is_labelled(entry_id):
+        score += LABEL_BONUS
+    return score
+
+
+def prioritize(store, ids, history=None, directory='.'):
+    """
+    按优先级排列待验证的条目，并在主机之间交错：
+    每一轮从每个主机各取一个条目，同一轮内按分数从高到低排列，
+    避免同一主机的大量链接连续占满线程。
+    分数只取决于主机和是否带标签，每个主机只计算一次；返回 id 数组。
+    """
+    history = load_host_history(directory) if history is None else history
+    reputation = domain_reputation(history)
+
+    # 主机按首次出现的顺序编号，每个条目只记录主机序号和是否带标签
+    host_index = KeyIndex()
+    base_scores = array('d')
+    labelled_counts = array('L')
+    entry_hosts = new_id_array()
+    labelled = bytearray()
+    for entry_id in ids:
+        host = store.hosts[entry_id]
+        index = host_index.index(url_key(host))
+        if index == len(base_scores):
+            base_scores.append(host_score(host, history, reputation))
+            labelled_counts.append(0)
+        is_labelled = store.is_labelled(entry_id)
+        entry_hosts.append(index)
+        labelled.append(is_labelled)
+        labelled_counts[index] += is_labelled
+    del host_index
+
+    # 同一主机内带标签的条目分数更高，排在前面，其余保持原顺序；条目的轮次即它在主机内的名次
+    scores = sorted({score + bonus for score in base_scores for bonus in (LABEL_BONUS, 0)}, reverse=True)
+    score_ranks = {score: rank for rank, score in enumerate(scores)}
+    seen = array('L', [0]) * (2 * len(base_scores))
+    entry_rounds = new_id_array()
+    entry_ranks = new_id_array()
+    for position, index in enumerate(entry_hosts):
+        if labelled[position]:
+            entry_rounds.append(seen[2 * index])
+            seen[2 * index] += 1
+            entry_ranks.append(score_ranks[base_scores[index] + LABEL_BONUS])
+        else:
+            entry_rounds.append(labelled_counts[index] + seen[2 * index + 1])
+            seen[2 * index + 1] += 1
+            entry_ranks.append(score_ranks[base_scores[index]])
+    del seen, labelled
+
+    # 按 (轮次, 分数从高到低, 主机序号) 排序：从低位到高位依次做稳定的计数排序
+    order = new_id_array(range(len(ids)))
+    order = _counting_sort(order, entry_hosts, len(base_scores))
+    order = _counting_sort(order, entry_ranks, len(scores))
+    order = _counting_sort(order, entry_rounds, max(entry_rounds, default=0) + 1)
+    return new_id_array(ids[position] for position in order)
+
+
+def _counting_sort(order, keys, key_count):
+    """按 keys[位置] 稳定排序 order 中的位置，键为 0 到 key_count-1 的整数"""
+    starts = array('L', [0]) * (key_count + 1)
+    for position in order:
+        starts[keys[position] + 1] += 1
+    for key in range(key_count):
+        starts[key + 1] += starts[key]
+    result = array('L', [0]) * len(order)
+    for position in order:
+        key = keys[position]
+        result[starts[key]] = position
+        starts[key] += 1
+    return result
@@ -0,0 +1,219 @@
+import os
+import re
+import uuid
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+from .common import SINGBOX_FILE, get_base_domain
+
+SINGBOX_SCRIPT = "const onSubscribe = async (proxies, subscription) => {\\n  return { proxies,\\\r\n    \\ subscription }\\n}\\n"
+PATH_TEMPLATE = "data/subscribes/{}.json"
+# 文件名中不允许出现的字符
+UNSAFE_PATH_CHARS = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+
+def safe_load_yaml(f):
+    """优先使用 libyaml 的 CSafeLoader 解析，大文件快很多"""
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    return yaml.load(f, Loader=loader)
+
+
+def load_subscribes(yaml_file_path):
+    """
+    读取 subscribes.yaml，返回 (原始数据, 订阅列表)。
+    文件不存在或无法识别时原始数据为 None，订阅列表为新的空列表。
+    """
+    if not os.path.exists(yaml_file_path):
+        return None, []
+    try:
+        with open(yaml_file_path, 'r', encoding='utf-8') as f:
+            data = safe_load_yaml(f)
+    except Exception as e:
+        print(f"警告：读取现有 {SINGBOX_FILE} 文件时发生错误：{e}。将创建新文件。")
+        return None, []
+    if isinstance(data, dict) and isinstance(data.get('proxies'), list):
+        return data, data['proxies']
+    if isinstance(data, list):
+        return data, data
+    if data is not None:
+        print(f"警告：{SINGBOX_FILE} 文件格式无法识别，将创建新的文件。")
+    return None, []
+
+
+def new_subscription_id(used_ids):
+    """生成不在 used_ids 中的 GUI.for.SingBox 订阅 id"""
+    while True:
+        subscription_id = f"ID_{uuid.uuid4().hex[:10]}"
+        if subscription_id not in used_ids:
+            return subscription_id
+
+
+def unique_path(name, used_paths):
+    """按名称生成 data/subscribes/{name}.json，重名时追加编号，保证不与已有路径冲突"""
+    base_name = UNSAFE_PATH_CHARS.sub('_', name).strip() or 'subscribe'
+    path = PATH_TEMPLATE.format(base_name)
+    index = 1
+    while path in used_paths:
+        path = PATH_TEMPLATE.format(f"{base_name} ({index})")
+        index += 1
+    used_paths.add(path)
+    return path
+
+
+def make_singbox_subscription(name, url, subscription_id, path):
+    """生成 GUI.for.SingBox 订阅记录，填充所有必要字段"""
+    return {
+        'id': subscription_id,
+        'name': name,
+        'upload': 0,
+        'download': 0,
+        'total': 0,
+        'expire': 0,
+        'updateTime': 0,
+        'type': 'Http',
+        'url': url,
+        'website': '',
+        'path': path,
+        'include': '',
+        'exclude': '',
+        'includeProtocol': '',
+        'excludeProtocol': '',
+        'proxyPrefix': '',
+        'disabled': False,
+        'inSecure': False,
+        'requestMethod': 'GET',
+        'header': {'request': {}, 'response': {}},
+        'proxies': [],
+        'script': SINGBOX_SCRIPT
+    }
+
+
+class SubscribeIndex:
+    """
+    subscribes.yaml 中订阅记录的索引，按链接和 id 查找，并记录已占用的 path。
+    合并时只修改需要变化的记录，其余记录原样保留。
+    """
+    __slots__ = ('records', 'by_url', 'by_id', 'used_paths', 'full_record', 'added', 'updated', 'path', 'data')
+
+    def __init__(self, records, full_record=True):
+        self.records = records
+        # 由 load 读取时记录文件路径和原始数据
+        self.path = None
+        self.data = None
+        self.by_url = {}
+        self.by_id = {}
+        self.used_paths = set()
+        self.full_record = full_record
+        self.added = 0
+        self.updated = 0
+
+        clashing = []
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            url = record.get('url')
+            if isinstance(url, str):
+                self.by_url.setdefault(url.strip(), record)
+            # id 和 path 分别判断，只重新分配真正重复的那一个
+            id_clash = bool(record.get('id')) and record['id'] in self.by_id
+            if record.get('id') and not id_clash:
+                self.by_id[record['id']] = record
+            path = record.get('path')
+            path_clash = bool(path) and path in self.used_paths
+            if path and not path_clash:
+                self.used_paths.add(path)
+            if id_clash or path_clash:
+                clashing.append((record, id_clash, path_clash))
+
+        if full_record:
+            # 旧版本写入时重名会产生相同的 path，只修正这些记录
+            for record, id_clash, path_clash in clashing:
+                if id_clash:
+                    record['id'] = new_subscription_id(self.by_id)
+                    self.by_id[record['id']] = record
+                if path_clash:
+                    record['path'] = unique_path(record.get('name') or 'subscribe', self.used_paths)
+                self.updated += 1
+            for record in records:
+                if isinstance(record, dict) and self._fill_missing(record):
+                    self.updated += 1
+
+    @classmethod
+    def load(cls, yaml_file_path, full_record=True):
+        """读取 subscribes.yaml 并建立索引；去重和合并共用同一个索引，文件只解析一次"""
+        data, records = load_subscribes(yaml_file_path)
+        index = cls(records, full_record)
+        index.path = yaml_file_path
+        index.data = data
+        return index
+
+    def appendable(self):
+        """
+        只新增了记录、且现有文件以块格式列出订阅时，新记录可以直接追加到文件末尾，
+        结果与重新写出整个文件相同，大文件不必整体重新序列化。
+        """
+        if self.updated or not self.added or self.path is None:
+            return False
+        if isinstance(self.data, list):
+            prefix = b'- '
+        elif isinstance(self.data, dict) and list(self.data) == ['proxies']:
+            prefix = b'proxies:\n- '
+        else:
+            return False
+        try:
+            with open(self.path, 'rb') as f:
+                head = f.read(len(prefix))
+                f.seek(-1, os.SEEK_END)
+                return head == prefix and f.read(1) == b'\n'
+        except OSError:
+            return False
+
+    def _fill_missing(self, record):
+        """补全旧记录（例如只有 name/url 的记录）缺少的字段，返回是否有修改"""
+        if not isinstance(record.get('url'), str):
+            return False
+        missing = False
+        if not record.get('id'):
+            record['id'] = new_subscription_id(self.by_id)
+            self.by_id[record['id']] = record
+            missing = True
+        if not record.get('path'):
+            record['path'] = unique_path(record.get('name') or 'subscribe', self.used_paths)
+            missing = True
+        template = make_singbox_subscription(record.get('name', ''), record['url'], record['id'], record['path'])
+        for key, value in template.items():
+            if key not in record:
+                record[key] = value
+                missing = True
+        return missing
+
+    def upsert(self, name, url):
+        """
+        链接已存在时更新名称，不存在时追加新记录；返回 'added'/'updated'/None。
+        新名称只是主机名（来自裸链接）时不覆盖已有名称；path 保持不变，以免 GUI 丢失缓存。
+        """
+        record = self.by_url.get(url)
+        if record is not None:
+            if record.get('name') == name or name == get_base_domain(url):
+                return None
+            record['name'] = name
+            self.updated += 1
+            return 'updated'
+
+        if self.full_record:
+            subscription_id = new_subscription_id(self.by_id)
+            record = make_singbox_subscription(name, url, subscription_id, unique_path(name, self.used_paths))
+            self.by_id[subscription_id] = record
+        else:
+            record = {'name': name, 'url': url}
+        self.records.append(record)
+        self.by_url[url] = record
+        self.added += 1
+        return 'added'
+
+    @property
+    def changed(self):
+        return bool(self.added or self.updated)
@@ -0,0 +1,195 @@
+import os
+from collections import defaultdict
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+from . import jsonio
+from .common import COMPRESS_SUFFIXES, SINGBOX_FILE, open_output, shard_dir_name
+from .ids import GroupIdAllocator
+from .singbox import SubscribeIndex
+
+
+def get_next_id(directory='.', required=False):
+    """
+    从pm.json文件中获取下一个可用的分组ID，同时避开磁盘上已存在的分组文件。
+    required 为 True 时，文件缺失或无法解析返回 None，否则从 ID 0 开始。
+    """
+    allocator = GroupIdAllocator.load(directory, required)
+    return None if allocator is None else allocator.next_free()
+
+
+def make_nekobox_group(group_id, name, url):
+    """生成 nekobox 分组配置"""
+    return {
+        "archive": False,
+        "front_proxy_id": -1,
+        "id": group_id,
+        "info": "",
+        "landing_proxy_id": -1,
+        "lastup": 0,
+        "manually_column_width": False,
+        "name": name,
+        "skip_auto_update": False,
+        "url": url
+    }
+
+
+def write_nekobox_json(final_entries, directory='.', allocator=None, shard_size=None, bundle=None, compress=None):
+    """
+    将成功的订阅写入 nekobox 配置文件，名称重复时自动编号。
+    allocator 为 GroupIdAllocator，未提供时从 directory 中的 pm.json 读取。
+    shard_size 指定时，每 shard_size 个分组放入一个 shard_XXXX 子目录。
+    bundle 指定时，所有分组按 JSONL 写入这一个合集文件，不逐个创建文件，也不修改 pm.json。
+    """
+    if allocator is None:
+        allocator = GroupIdAllocator.load(directory)
+    if allocator is None:
+        return []
+
+    bundle_file = None
+    if bundle is not None:
+        bundle_file, bundle = open_output(bundle, compress)
+
+    name_counts = defaultdict(int)
+    new_ids = []
+    try:
+        for entry in final_entries:
+            base_name = entry['name']
+            current_name = base_name
+            if name_counts[base_name] > 0:
+                current_name = f"{base_name} ({name_counts[base_name]})"
+            name_counts[base_name] += 1
+
+            next_id = allocator.allocate()
+            config_data = make_nekobox_group(next_id, current_name, entry['url'])
+
+            if bundle_file is not None:
+                bundle_file.write(jsonio.dumps(config_data, compact=True))
+                bundle_file.write('\n')
+                new_ids.append(next_id)
+                continue
+
+            file_name = f"{next_id}.json"
+            if shard_size:
+                file_name = os.path.join(shard_dir_name(next_id, shard_size), file_name)
+            try:
+                file_path = os.path.join(directory, file_name)
+                if shard_size:
+                    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                # 'x' 模式：分配器已避开现有文件，这里再兜底一次，绝不覆盖
+                with open(file_path, 'x', encoding='utf-8') as outfile:
+                    jsonio.dump(config_data, outfile, indent=4)
+                print(f"已创建文件：{file_name}，名称：{current_name}")
+                new_ids.append(next_id)
+            except Exception as e:
+                print(f"写入文件 {file_name} 时发生错误：{e}")
+    finally:
+        if bundle_file is not None:
+            bundle_file.close()
+
+    if bundle_file is not None:
+        print(f"已将 {len(new_ids)} 个分组写入合集文件：{bundle}（pm.json 未修改）")
+        return new_ids
+
+    allocator.commit(new_ids)
+    return new_ids
+
+
+def write_singbox_yaml(final_entries, directory='.', full_record=True, index=None):
+    """
+    将成功的订阅合并到 sing-box 配置文件：按链接更新已有记录、追加新记录，保证 path 不重复。
+    full_record 为 False 时新记录只写入 name/url 两个字段。没有任何变化时不重写文件，只有新增时追加到文件末尾。
+    index 为去重时已读取的 SubscribeIndex，提供时不再重新读取文件，full_record 以 index 的设置为准。
+    """
+    yaml_file_path = os.path.join(directory, SINGBOX_FILE)
+    if index is None:
+        index = SubscribeIndex.load(yaml_file_path, full_record)
+    records = index.records
+    for entry in final_entries:
+        index.upsert(entry['name'], entry['url'])
+
+    if not index.changed:
+        print(f"Singbox 配置文件 '{SINGBOX_FILE}' 没有需要更新的订阅。")
+        return
+
+    if index.data is None:
+        # GUI.for.SingBox 使用列表格式，简单模式沿用 {'proxies': [...]} 格式
+        final_data = records if index.full_record else {'proxies': records}
+    else:
+        final_data = index.data
+
+    try:
+        if index.appendable():
+            with open(yaml_file_path, 'a', encoding='utf-8') as f:
+                yaml.dump(records[-index.added:], f, allow_unicode=True, indent=2, sort_keys=False)
+        else:
+            with open(yaml_file_path, 'w', encoding='utf-8') as f:
+                yaml.dump(final_data, f, allow_unicode=True, indent=2, sort_keys=False)
+        print(f"Singbox 配置文件 '{SINGBOX_FILE}' 已成功更新：新增 {index.added} 个，更新 {index.updated} 个。")
+    except Exception as e:
+        print(f"写入 Singbox 配置文件 '{SINGBOX_FILE}' 时发生错误：{e}")
+
+
+def dump_json_array(entries, f):
+    """逐条写出 JSON 数组，输出与 json.dump(list, indent=4) 相同"""
+    first = True
+    for entry in entries:
+        f.write('[\n    ' if first else ',\n    ')
+        f.write(jsonio.dumps(entry, indent=4).replace('\n', '\n    '))
+        first = False
+    f.write('[]' if first else '\n]')
+
+
+def dump_json_lines(entries, f):
+    """每个条目写成一行 JSON"""
+    for entry in entries:
+        f.write(jsonio.dumps(entry, compact=True))
+        f.write('\n')
+
+
+def remove_stale_results(directory, base_name):
+    """删除各格式的 base_name 结果文件（.jpg、.jsonl 及其压缩文件）"""
+    for suffix in ('.jpg', '.jsonl') + tuple(f".jsonl{suffix}" for suffix in COMPRESS_SUFFIXES.values()):
+        file_name = os.path.join(directory, base_name + suffix)
+        if os.path.exists(file_name):
+            os.remove(file_name)
+            print(f"已删除过期的 {base_name + suffix} 文件。")
+
+
+def write_results(store, final_ids, failed_ids=None, directory='.', results_format='json', compress=None,
+                  unchecked_ids=None):
+    """
+    写入 suc.jpg，如提供失败列表则同时写入 fa.jpg，有未验证的条目时写入 unchecked.jpg。
+    results_format 为 'jsonl' 时改为逐行写入 suc.jsonl/fa.jsonl，可配合 compress 压缩。
+    验证全部完成（unchecked_ids 为空）时删除上一次留下的 unchecked 结果文件。
+    """
+    outputs = [('suc', final_ids)]
+    if failed_ids is not None:
+        outputs.append(('fa', failed_ids))
+    if unchecked_ids:
+        outputs.append(('unchecked', unchecked_ids))
+    elif unchecked_ids is not None:
+        remove_stale_results(directory, 'unchecked')
+
+    for base_name, ids in outputs:
+        if results_format == 'jsonl':
+            f, file_name = open_output(os.path.join(directory, f"{base_name}.jsonl"), compress)
+            with f:
+                dump_json_lines(store.iter_entries(ids), f)
+        else:
+            file_name = os.path.join(directory, f"{base_name}.jpg")
+            with open(file_name, 'w', encoding='utf-8') as f:
+                dump_json_array(store.iter_entries(ids), f)
+        print(f"已生成 {os.path.basename(file_name)} 文件。")
+
+
+# 目标配置类型 -> 写入函数
+SINKS = {
+    'nekobox': write_nekobox_json,
+    'singbox': write_singbox_yaml,
+}
+# 按链接更新已有记录的目标配置：现有链接不在外部去重中丢弃，而是交给写入函数更新名称
+UPSERT_SINKS = frozenset({'singbox'})
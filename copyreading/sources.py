@@ -0,0 +1,375 @@
+import base64
+import binascii
+import csv
+import gzip
+import io
+import os
+import re
+import zipfile
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from . import jsonio
+from .common import HISTORY_FILE, PM_FILE, RESULT_FILES, get_base_domain, list_files
+
+# TXT 中的三种格式合并为一个正则，在每个位置按顺序尝试，同一文件中可以混用：
+#   带表情符号的两行格式：📋 机场名称: xxx / 🔗 订阅链接: xxx
+#   不带表情符号的两行格式：机场名称: xxx / 订阅链接: xxx
+#   仅URL：其余位置的 http(s):// 链接，第 5 组为其中的主机部分
+TXT_PATTERN = re.compile(
+    r'📋\s*机场名称:\s*(.+)\n🔗\s*订阅链接:\s*(.+)'
+    r'|机场名称:\s*(.+)\n订阅链接:\s*(.+)'
+    r'|https?://(?=\S)([^\s/?#]*)\S*'
+)
+# 单独判断一个值是否为链接，例如无表头 CSV 的单元格
+URL_PATTERN = re.compile(r'https?://\S+')
+# 每种格式都以这两个子串之一开头（带表情符号的格式在“机场名称”前还有 📋），
+# 用 str.find 跳到下一处再运行正则，不必在每个字符处尝试
+LABEL_MARKER = '机场名称'
+URL_MARKER = 'http'
+EMOJI_MARKER = '📋'
+# 一处匹配之后这么多字符内没有标记时，改用 str.find 跳到下一处
+TXT_GAP = 96
+# 逐块读取TXT时每块的大致字符数
+TXT_CHUNK_SIZE = 1 << 20
+# 读取输入时默认跳过的文件，它们是本项目自己的输出
+INPUT_EXCLUDE = (PM_FILE, HISTORY_FILE) + RESULT_FILES
+
+
+# 后缀 -> (类型名称, 读取函数)，读取函数接收已打开的文本流并逐条产出 {'name', 'url'}
+READERS = {}
+# 后缀 -> (类型名称, 解包函数)，解包函数接收二进制流，逐个产出 (内部文件名, 二进制流)
+CONTAINERS = {}
+
+
+def register_reader(suffixes, label, reader):
+    """注册一种输入源读取器，后注册的同名后缀会覆盖旧的"""
+    if isinstance(suffixes, str):
+        suffixes = (suffixes,)
+    for suffix in suffixes:
+        READERS[suffix.lower()] = (label, reader)
+
+
+def register_container(suffixes, label, opener):
+    """注册一种压缩/归档格式，解包后按内部文件名再次分发到读取器"""
+    if isinstance(suffixes, str):
+        suffixes = (suffixes,)
+    for suffix in suffixes:
+        CONTAINERS[suffix.lower()] = (label, opener)
+
+
+def match_suffix(file_name, table):
+    """在注册表中查找文件名匹配的最长后缀，返回 (后缀, 注册项)"""
+    lower_name = file_name.lower()
+    for suffix in sorted(table, key=len, reverse=True):
+        if lower_name.endswith(suffix):
+            return suffix, table[suffix]
+    return None, None
+
+
+def find_reader(file_name):
+    """根据文件名后缀查找读取器，优先匹配最长的后缀"""
+    return match_suffix(file_name, READERS)[1]
+
+
+def find_label(file_name):
+    """返回文件对应的类型名称，压缩/归档格式优先"""
+    for table in (CONTAINERS, READERS):
+        found = match_suffix(file_name, table)[1]
+        if found is not None:
+            return found[0]
+    return None
+
+
+def parse_txt_content(content):
+    """
+    单遍解析TXT文本：每一处依次尝试带表情符号的两行格式、不带表情符号的两行格式和仅URL，
+    同一文件中的多种格式都能识别；裸链接的名称取主机名。
+    结果与 TXT_PATTERN.finditer 相同，但只在标记附近运行正则，长段说明文字用 str.find 跳过。
+    """
+    return _txt_entries(_iter_txt_matches(content))
+
+
+def _txt_entries(matches):
+    """把 TXT_PATTERN 的匹配转换为条目"""
+    for match in matches:
+        name, url, plain_name, plain_url, host = match.groups()
+        if url is not None:
+            yield {'name': name.strip(), 'url': url.strip()}
+        elif plain_url is not None:
+            yield {'name': plain_name.strip(), 'url': plain_url.strip()}
+        else:
+            url = match.group(0)
+            # 普通的 ASCII 主机名与 urlparse 的 netloc 相同，其余情况交给 get_base_domain 处理
+            if not host or not host.isascii() or '[' in host or ']' in host:
+                host = get_base_domain(url)
+            if host:
+                yield {'name': host, 'url': url}
+
+
+def _iter_txt_matches(content):
+    """
+    按顺序产出 TXT_PATTERN 的匹配，与 finditer 相同。
+    标记密集时直接用 finditer 连续查找；两处匹配之间超过 TXT_GAP 个字符时，
+    改为用 str.find 找到下一处“http”或“机场名称”，再从那里开始查找。
+    """
+    find = content.find
+    pos = 0
+    next_url = find(URL_MARKER)
+    next_label = find(LABEL_MARKER)
+    while next_url >= 0 or next_label >= 0:
+        if next_label < 0 or 0 <= next_url < next_label:
+            start = next_url
+        else:
+            # 带表情符号的格式从前面的 📋 开始，两者之间只能是空白
+            start = next_label
+            while start > pos and content[start - 1].isspace():
+                start -= 1
+            if start > pos and content[start - 1] == EMOJI_MARKER:
+                start -= 1
+            else:
+                start = next_label
+
+        if start - pos > TXT_GAP:
+            # 标记稀疏：跳到标记处单独查找一次
+            match = TXT_PATTERN.search(content, start)
+            if match is None:
+                return
+            yield match
+            pos = match.end()
+        else:
+            # 标记密集：由正则连续查找，遇到较大的间隔后改回 str.find 跳过
+            for match in TXT_PATTERN.finditer(content, start):
+                yield match
+                gap = match.start() - pos
+                pos = match.end()
+                if gap > TXT_GAP:
+                    break
+            else:
+                return
+
+        if next_url < pos:
+            next_url = find(URL_MARKER, pos)
+        if next_label < pos:
+            next_label = find(LABEL_MARKER, pos)
+
+
+def read_txt(f):
+    """从TXT文件中按块提取，每块在行边界切分，不需要一次读入整个文件"""
+    carry = ''
+    while True:
+        lines = f.readlines(TXT_CHUNK_SIZE)
+        if not lines:
+            break
+        lines[0] = carry + lines[0]
+        # 块的最后一行是“机场名称”行时留到下一块，与下一行的“订阅链接”配对
+        carry = lines.pop() if LABEL_MARKER in lines[-1] else ''
+        if lines:
+            yield from parse_txt_content(''.join(lines))
+    if carry:
+        yield from parse_txt_content(carry)
+
+
+def read_json(f):
+    """从单个分组JSON文件中提取"""
+    data = jsonio.load(f)
+    if isinstance(data, dict) and 'name' in data and 'url' in data:
+        yield {'name': data['name'].strip(), 'url': data['url'].strip()}
+
+
+def read_yaml(f):
+    """从YAML文件中提取，支持 {'proxies': [...]} 和列表两种格式"""
+    if yaml is None:
+        raise ImportError("缺少 PyYAML，请使用 pip install pyyaml 安装")
+    data = yaml.safe_load(f)
+    if isinstance(data, dict) and 'proxies' in data:
+        for proxy in data['proxies']:
+            if isinstance(proxy, dict) and 'name' in proxy and 'url' in proxy:
+                yield {'name': proxy['name'].strip(), 'url': proxy['url'].strip()}
+    elif isinstance(data, list):
+        for item in data:
+            if isinstance(item, dict) and 'url' in item:
+                name = item.get('name', get_base_domain(item['url']))
+                yield {'name': name.strip(), 'url': item['url'].strip()}
+
+
+def read_jsonl(f):
+    """逐行读取 JSON Lines，每行一个含 url 的对象，无法解析的行计数后跳过"""
+    bad_lines = 0
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = jsonio.loads(line)
+        except ValueError:
+            bad_lines += 1
+            continue
+        if isinstance(item, dict) and isinstance(item.get('url'), str):
+            url = item['url'].strip()
+            name = item.get('name') or get_base_domain(url)
+            if url and name:
+                yield {'name': str(name).strip(), 'url': url}
+    if bad_lines:
+        print(f"警告：跳过了 {bad_lines} 行无法解析的 JSON。")
+
+
+def read_csv(f):
+    """读取CSV，有 name/url 表头时按列取值，否则取每行第一个链接"""
+    rows = csv.reader(f)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = [column.strip().lower() for column in header]
+    name_index = url_index = None
+    for index, column in enumerate(columns):
+        if column in ('name', '机场名称'):
+            name_index = index
+        elif column in ('url', '订阅链接'):
+            url_index = index
+
+    if url_index is None:
+        # 没有表头，第一行也是数据
+        rows = _chain_row(header, rows)
+
+    for row in rows:
+        if url_index is not None:
+            if url_index >= len(row):
+                continue
+            url = row[url_index].strip()
+            name = row[name_index].strip() if name_index is not None and name_index < len(row) else ''
+        else:
+            url = next((cell.strip() for cell in row if URL_PATTERN.match(cell.strip())), '')
+            name = next((cell.strip() for cell in row if cell.strip() and cell.strip() != url), '')
+        if not url:
+            continue
+        name = name or get_base_domain(url)
+        if name:
+            yield {'name': name, 'url': url}
+
+
+def _chain_row(first, rows):
+    yield first
+    yield from rows
+
+
+def read_base64(f):
+    """读取 base64 编码的订阅列表，解码后按TXT规则解析"""
+    content = ''.join(f.read().split())
+    content += '=' * (-len(content) % 4)
+    try:
+        decoded = base64.b64decode(content, altchars=b'-_' if ('-' in content or '_' in content) else None, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"base64 解码失败: {e}")
+    yield from parse_txt_content(decoded.decode('utf-8', errors='replace'))
+
+
+def open_gzip(raw, file_name):
+    """解压 .gz，内部文件名去掉 .gz 后缀"""
+    with gzip.GzipFile(fileobj=raw) as stream:
+        yield file_name[:-3], stream
+
+
+def open_zstd(raw, file_name):
+    """解压 .zst，需要安装 zstandard"""
+    if zstandard is None:
+        raise ImportError("缺少 zstandard，请使用 pip install zstandard 安装")
+    with zstandard.ZstdDecompressor().stream_reader(raw) as stream:
+        yield file_name[:-4], stream
+
+
+def open_zip(raw, file_name):
+    """逐个打开 zip 中的文件，不解压到磁盘"""
+    with zipfile.ZipFile(raw) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            with archive.open(info) as stream:
+                yield f"{file_name}/{info.filename}", stream
+
+
+register_reader('.txt', 'TXT', read_txt)
+register_reader('.json', 'JSON', read_json)
+register_reader(('.yaml', '.yml'), 'YAML', read_yaml)
+register_reader(('.jsonl', '.ndjson'), 'JSONL', read_jsonl)
+register_reader('.csv', 'CSV', read_csv)
+register_reader(('.b64', '.base64'), 'BASE64', read_base64)
+register_container('.gz', 'GZIP', open_gzip)
+register_container('.zst', 'ZSTD', open_zstd)
+register_container('.zip', 'ZIP', open_zip)
+
+
+def iter_stream_entries(file_name, raw):
+    """从二进制流中读取条目，压缩/归档格式会解包后递归处理"""
+    _, container = match_suffix(file_name, CONTAINERS)
+    if container is not None:
+        for inner_name, stream in container[1](raw, file_name):
+            try:
+                yield from iter_stream_entries(inner_name, stream)
+            except Exception as e:
+                print(f"读取文件 {inner_name} 时发生错误：{e}")
+        return
+
+    found = find_reader(os.path.basename(file_name))
+    if found is None:
+        return
+    text = io.TextIOWrapper(raw, encoding='utf-8')
+    try:
+        yield from found[1](text)
+    finally:
+        # 只释放包装，底层流由打开它的一方关闭
+        text.detach()
+
+
+def iter_file_entries(file_name):
+    """打开文件并逐条产出条目，读取失败时打印错误并跳过"""
+    try:
+        with open(file_name, 'rb') as raw:
+            yield from iter_stream_entries(file_name, raw)
+    except Exception as e:
+        print(f"读取文件 {file_name} 时发生错误：{e}")
+
+
+def iter_subscriptions(directory='.', suffixes=None, exclude=INPUT_EXCLUDE):
+    """
+    逐条产出所有输入文件中的订阅，suffixes 为 None 时使用全部已注册的读取器和压缩格式。
+    全部读取完毕后打印各类型的统计。
+    """
+    if suffixes is None:
+        suffixes = tuple(READERS) + tuple(CONTAINERS)
+
+    labels = []
+    for suffix in suffixes:
+        label = find_label(suffix)
+        if label and label not in labels:
+            labels.append(label)
+
+    file_counts = dict.fromkeys(labels, 0)
+    entry_counts = dict.fromkeys(labels, 0)
+    for file_name in list_files(directory, suffixes, exclude):
+        label = find_label(os.path.basename(file_name))
+        if label is None:
+            continue
+        file_counts[label] = file_counts.get(label, 0) + 1
+        entry_counts.setdefault(label, 0)
+        for entry in iter_file_entries(file_name):
+            entry_counts[label] += 1
+            yield entry
+
+    for label in file_counts:
+        # 新增格式没有文件时不打印，保持原有输出简洁
+        if file_counts[label] or label in ('TXT', 'JSON', 'YAML'):
+            print(f"识别到 {label} 文件 {file_counts[label]} 个，获取订阅 {entry_counts[label]} 个。")
+
+
+def extract_subscriptions_from_files(directory='.', suffixes=None, exclude=INPUT_EXCLUDE):
+    """从多种文件中提取订阅链接，返回条目列表"""
+    return list(iter_subscriptions(directory, suffixes, exclude))
@@ -0,0 +1,235 @@
+import hashlib
+import re
+from array import array
+
+from .common import get_base_domain
+
+
+def entry_key(name, url):
+    """名称+链接的 8 字节摘要，去重时代替 (name, url) 元组"""
+    digest = hashlib.blake2b(f"{name}\n{url}".encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def url_key(url):
+    """链接的 8 字节摘要，用于和现有配置比对"""
+    digest = hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+# scheme://host 形式的链接中的主机部分，后面紧跟路径、查询、片段或结尾
+HOST_PATTERN = re.compile(r'[A-Za-z][A-Za-z0-9+.-]*://([^/?#\s\[\]]+)(?=[/?#]|$)')
+
+
+def url_host(url):
+    """与 get_base_domain 结果相同；普通的 ASCII 主机名直接截取，省去 urlparse"""
+    match = HOST_PATTERN.match(url)
+    if match is not None and match.group(1).isascii():
+        return match.group(1)
+    return get_base_domain(url)
+
+
+def new_id_array(ids=()):
+    """条目 id 列表，使用紧凑的无符号整数数组"""
+    return array('L', ids)
+
+
+class KeySet:
+    """
+    8 字节摘要的集合，开放寻址保存在 array('Q') 中，负载不超过一半，每个键占 16~32 字节，
+    而 set 中每个键是一个独立的 int 对象，约 70 字节以上。
+    """
+    __slots__ = ('_table', '_mask', '_count')
+
+    def __init__(self, keys=(), capacity=1024):
+        self._table = array('Q', [0]) * capacity
+        self._mask = capacity - 1
+        self._count = 0
+        for key in keys:
+            self.add(key)
+
+    def __len__(self):
+        return self._count
+
+    def _slot(self, key):
+        table = self._table
+        mask = self._mask
+        index = key & mask
+        while True:
+            value = table[index]
+            if value == 0 or value == key:
+                return index
+            index = (index + 1) & mask
+
+    def add(self, key):
+        """加入摘要，已存在时返回 False"""
+        # 0 表示空位，摘要恰好为 0 时按 1 处理
+        key = key or 1
+        index = self._slot(key)
+        if self._table[index] == key:
+            return False
+        self._table[index] = key
+        self._count += 1
+        if self._count * 2 > len(self._table):
+            self._grow()
+        return True
+
+    def __contains__(self, key):
+        key = key or 1
+        return self._table[self._slot(key)] == key
+
+    def _grow(self):
+        old_table = self._table
+        self._table = array('Q', [0]) * (len(old_table) * 2)
+        self._mask = len(self._table) - 1
+        for key in old_table:
+            if key:
+                self._table[self._slot(key)] = key
+
+
+class KeyIndex(KeySet):
+    """
+    8 字节摘要到连续序号的映射，序号按首次出现的顺序分配，与 KeySet 结构相同，
+    序号保存在与摘要表并行的 array('L') 中，代替以字符串为键的 dict。
+    """
+    __slots__ = ('_values',)
+
+    def __init__(self, capacity=1024):
+        self._values = array('L', [0]) * capacity
+        super().__init__(capacity=capacity)
+
+    def index(self, key):
+        """返回摘要的序号，新摘要编为下一个序号"""
+        key = key or 1
+        slot = self._slot(key)
+        if self._table[slot] == key:
+            return self._values[slot]
+        value = self._count
+        self._table[slot] = key
+        self._values[slot] = value
+        self._count += 1
+        if self._count * 2 > len(self._table):
+            self._grow()
+        return value
+
+    def add(self, key):
+        """加入摘要，已存在时返回 False"""
+        count = self._count
+        return self.index(key) == count
+
+    def _grow(self):
+        old_table = self._table
+        old_values = self._values
+        self._table = array('Q', [0]) * (len(old_table) * 2)
+        self._values = array('L', [0]) * len(self._table)
+        self._mask = len(self._table) - 1
+        for key, value in zip(old_table, old_values):
+            if key:
+                slot = self._slot(key)
+                self._table[slot] = key
+                self._values[slot] = value
+
+
+class Column:
+    """按 id 读取 EntryStore 某一列的只读视图，支持 column[id] 和 len()"""
+    __slots__ = ('_get', '_store')
+
+    def __init__(self, get, store):
+        self._get = get
+        self._store = store
+
+    def __getitem__(self, entry_id):
+        return self._get(entry_id)
+
+    def __len__(self):
+        return len(self._store)
+
+
+class EntryStore:
+    """
+    按列存储条目，每个条目只保存一次，各阶段之间传递整数 id 而不是复制 dict。
+    名称和链接以 UTF-8 连续保存在一个 bytearray 中，偏移量保存在 array('Q') 中，
+    读取时才解码成字符串；名称与主机名相同（仅URL的条目）时不保存名称，主机名也按需从链接计算。
+    """
+    __slots__ = ('names', 'urls', 'hosts', 'reasons', '_text', '_offsets', '_name_is_host', '_keys')
+
+    def __init__(self):
+        self._text = bytearray()
+        # 第 i 个条目的名称为 _text[_offsets[2i]:_offsets[2i+1]]，链接为 _text[_offsets[2i+1]:_offsets[2i+2]]
+        self._offsets = array('Q', [0])
+        self._name_is_host = bytearray()
+        self._keys = KeySet()
+        self.names = Column(self._name, self)
+        self.urls = Column(self._url, self)
+        self.hosts = Column(self._host, self)
+        # 只为失败的条目记录原因
+        self.reasons = {}
+
+    def __len__(self):
+        return len(self._name_is_host)
+
+    def _name(self, entry_id):
+        if self._name_is_host[entry_id]:
+            return self._host(entry_id)
+        offsets = self._offsets
+        return self._text[offsets[2 * entry_id]:offsets[2 * entry_id + 1]].decode('utf-8')
+
+    def _url(self, entry_id):
+        offsets = self._offsets
+        return self._text[offsets[2 * entry_id + 1]:offsets[2 * entry_id + 2]].decode('utf-8')
+
+    def _host(self, entry_id):
+        return url_host(self._url(entry_id))
+
+    def is_labelled(self, entry_id):
+        """名称与主机名不同，即来自“机场名称”等标签而不是裸链接"""
+        return not self._name_is_host[entry_id]
+
+    def add(self, name, url):
+        """添加条目并返回 id，名称和链接完全相同的条目已存在时返回 None"""
+        if not self._keys.add(entry_key(name, url)):
+            return None
+
+        name_is_host = name == url_host(url)
+        if not name_is_host:
+            self._text += name.encode('utf-8')
+        self._offsets.append(len(self._text))
+        self._text += url.encode('utf-8')
+        self._offsets.append(len(self._text))
+        self._name_is_host.append(name_is_host)
+        return len(self._name_is_host) - 1
+
+    def extend(self, entries, verbose=False):
+        """批量添加条目，跳过完全重复的条目，返回新条目的 id 数组"""
+        ids = new_id_array()
+        for entry in entries:
+            entry_id = self.add(entry['name'], entry['url'])
+            if entry_id is None:
+                if verbose:
+                    print(f"跳过完全重复条目：名称='{entry['name']}', 订阅链接='{entry['url']}'")
+                continue
+            ids.append(entry_id)
+        return ids
+
+    def entry(self, entry_id):
+        """按需生成单个条目的 dict，用完即丢"""
+        return {'name': self.names[entry_id], 'url': self.urls[entry_id]}
+
+    def iter_entries(self, ids):
+        """逐个产出条目 dict，不会一次性生成整个列表"""
+        for entry_id in ids:
+            yield self.entry(entry_id)
+
+    def exclude_urls(self, ids, existing_keys):
+        """过滤掉链接摘要在 existing_keys 中的条目"""
+        urls = self.urls
+        return new_id_array(entry_id for entry_id in ids if url_key(urls[entry_id]) not in existing_keys)
+
+    def split_urls(self, ids, existing_keys):
+        """按链接摘要是否在 existing_keys 中拆分，返回 (新条目 id, 已存在条目 id)"""
+        urls = self.urls
+        new_ids = new_id_array()
+        existing_ids = new_id_array()
+        for entry_id in ids:
+            (existing_ids if url_key(urls[entry_id]) in existing_keys else new_ids).append(entry_id)
+        return new_ids, existing_ids
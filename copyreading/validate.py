@@ -0,0 +1,234 @@
+import datetime
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+import requests
+import socks
+from requests.exceptions import RequestException, ConnectionError, Timeout
+
+from .store import new_id_array
+
+
+# 因取消而没有得到结论的条目使用的原因
+UNCHECKED_REASON = 'unchecked'
+# validate_entries 中每个条目的状态，按 id 保存在 bytearray 中
+PENDING, SUCCEEDED, FAILED = 1, 2, 3
+# 单次请求的超时时间（秒）
+REQUEST_TIMEOUT = 15
+# 主线程等待结果时的轮询间隔，保证信号能及时处理
+POLL_INTERVAL = 0.5
+
+
+class DaemonExecutor:
+    """
+    工作线程为守护线程的简单线程池，只提供 submit 和 shutdown。
+    Session.close() 只能释放空闲连接，无法中断已在等待响应的请求；
+    ThreadPoolExecutor 的线程会在解释器退出时被逐个等待，取消后程序仍要再等最多 REQUEST_TIMEOUT 秒。
+    守护线程在退出时直接被放弃，卡住的请求不会拖住程序。
+    """
+
+    def __init__(self, max_workers):
+        self._tasks = queue.SimpleQueue()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"validate-{index}", daemon=True)
+            for index in range(max_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _work(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                return
+            future, func, args = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, func, *args):
+        future = Future()
+        self._tasks.put((future, func, args))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """cancel_futures 为 True 时取消尚未开始的任务；wait 为 False 时不等待进行中的任务"""
+        if cancel_futures:
+            while True:
+                try:
+                    task = self._tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if task is not None:
+                    task[0].cancel()
+        for _ in self._threads:
+            self._tasks.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+def is_url_valid(entry, proxies_list, token=None):
+    """
+    验证单个 URL，并返回验证结果和失败原因。
+    token 为 CancelToken，取消后不再发起新的请求，返回的失败原因为 UNCHECKED_REASON。
+    """
+    url = entry['url']
+    session = requests.Session()
+    if token is not None and not token.register(session):
+        return False, {'name': entry['name'], 'url': url, 'failedReason': UNCHECKED_REASON}
+    try:
+        return _check_url(entry, proxies_list, session, token)
+    finally:
+        if token is not None:
+            token.unregister(session)
+        session.close()
+
+
+def _check_url(entry, proxies_list, session, token):
+    url = entry['url']
+    user_agents = {
+        'chrome': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'clashmeta': 'Clash-Verge/1.3.1',
+        'singbox': 'sing-box'
+    }
+
+    def aborted():
+        # 取消后的请求错误（包括会话被关闭引起的错误）不算作失败
+        return token is not None and token.cancelled()
+
+    def try_request(current_proxies=None):
+        for ua_name, ua_string in user_agents.items():
+            if aborted():
+                return False, UNCHECKED_REASON
+            headers = {'User-Agent': ua_string}
+            current_time = datetime.datetime.now().strftime("%H:%M:%S")
+            timeout = REQUEST_TIMEOUT if token is None else max(0.1, token.remaining(REQUEST_TIMEOUT))
+            timeout = min(timeout, REQUEST_TIMEOUT)
+
+            try:
+                response = session.head(url, timeout=timeout, allow_redirects=True, proxies=current_proxies, headers=headers)
+                
+                if 200 <= response.status_code < 400:
+                    print(f"-> 正在{'直接' if not current_proxies else '通过代理'}验证 URL: {url} ... UA:{ua_name} {current_time} 成功！")
+                    return True, "成功"
+                elif response.status_code in [403, 405, 429]:
+                    print(f"-> 正在{'直接' if not current_proxies else '通过代理'}验证 URL: {url} ... UA:{ua_name} {current_time} 成功 (状态码: {response.status_code}, 视为成功！)")
+                    return True, f"状态码: {response.status_code}"
+                else:
+                    print(f"-> 正在{'直接' if not current_proxies else '通过代理'}验证 URL: {url} ... UA:{ua_name} {current_time} 失败 (状态码: {response.status_code})。")
+                    return False, f"状态码: {response.status_code}"
+            except Timeout:
+                if aborted():
+                    return False, UNCHECKED_REASON
+                print(f"-> 正在{'直接' if not current_proxies else '通过代理'}验证 URL: {url} ... UA:{ua_name} {current_time} 失败 (超时)。")
+                return False, "超时"
+            except ConnectionError as e:
+                if aborted():
+                    return False, UNCHECKED_REASON
+                if '10054' in str(e):
+                    print(f"-> 正在{'直接' if not current_proxies else '通过代理'}验证 URL: {url} ... UA:{ua_name} {current_time} 成功 (网络连接错误: 10054, 视为成功！)")
+                    return True, "网络连接错误: 10054"
+                elif '10053' in str(e):
+                    print(f"-> 正在{'直接' if not current_proxies else '通过代理'}验证 URL: {url} ... UA:{ua_name} {current_time} 失败 (网络连接错误: 10053, 将尝试其他代理)。")
+                    continue
+                else:
+                    print(f"-> 正在{'直接' if not current_proxies else '通过代理'}验证 URL: {url} ... UA:{ua_name} {current_time} 失败 (网络请求错误: {e})。")
+                    return False, f"网络请求错误: {e}"
+            except RequestException as e:
+                if aborted():
+                    return False, UNCHECKED_REASON
+                print(f"-> 正在{'直接' if not current_proxies else '通过代理'}验证 URL: {url} ... UA:{ua_name} {current_time} 失败 (网络请求错误: {e})。")
+                return False, f"网络请求错误: {e}"
+        return False, "所有UA均失败"
+
+    is_success, reason = try_request()
+    if is_success:
+        return True, entry
+
+    if proxies_list:
+        print("正在尝试使用代理...")
+        for proxy_address in proxies_list:
+            if aborted():
+                break
+            proxies = {
+                "http": proxy_address,
+                "https": proxy_address,
+            }
+            try:
+                is_success, reason = try_request(proxies)
+                if is_success:
+                    return True, entry
+            except (socks.SocksError, requests.exceptions.ProxyError) as e:
+                print(f"警告: 代理 {proxy_address} 连接失败: {e}。将尝试下一个代理。")
+                reason = f"代理连接失败: {e}"
+                continue
+            except RequestException as e:
+                print(f"警告: 代理 {proxy_address} 验证失败: {e}。将尝试下一个代理。")
+                reason = f"代理验证失败: {e}"
+                continue
+    
+    if aborted():
+        return False, {'name': entry['name'], 'url': url, 'failedReason': UNCHECKED_REASON}
+
+    print(f"所有尝试均失败。链接: {url}")
+    return False, {'name': entry['name'], 'url': url, 'failedReason': reason}
+
+
+def validate_entries(store, ids, proxies_list=None, num_threads=8, token=None):
+    """
+    多线程验证订阅链接，返回 (成功 id, 失败 id, 未验证 id)，失败原因记录在 store.reasons 中。
+    条目按 ids 的顺序提交；token 被取消（截止时间到达或收到中断信号）后停止提交，
+    不再等待进行中的请求，所有没有结论的条目计入未验证列表。
+    结果按 id 排序，与读取顺序一致。
+    """
+    # 按 id 记录状态，不为每个条目创建对象；最后按 id 顺序取出各类结果
+    status = bytearray(len(store))
+    for entry_id in ids:
+        status[entry_id] = PENDING
+
+    def check(entry_id):
+        return entry_id, is_url_valid(store.entry(entry_id), proxies_list, token)
+
+    pending = iter(ids)
+    in_flight = set()
+    executor = DaemonExecutor(num_threads)
+    try:
+        while token is None or not token.cancelled():
+            # 只保持少量排队任务，保证后提交的低优先级条目不会抢先
+            while len(in_flight) < num_threads * 2:
+                entry_id = next(pending, None)
+                if entry_id is None:
+                    break
+                in_flight.add(executor.submit(check, entry_id))
+            if not in_flight:
+                break
+
+            # 分段等待，让 Ctrl-C 和截止时间能及时生效
+            timeout = POLL_INTERVAL if token is None else min(POLL_INTERVAL, token.remaining(POLL_INTERVAL))
+            done, in_flight = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                entry_id, (is_success, result_data) = future.result()
+                if is_success:
+                    status[entry_id] = SUCCEEDED
+                elif result_data.get('failedReason') != UNCHECKED_REASON:
+                    status[entry_id] = FAILED
+                    store.reasons[entry_id] = result_data.get('failedReason', '')
+    finally:
+        stopped = token is not None and token.cancelled()
+        if stopped:
+            print(f"\n验证已停止（{token.reason}），放弃 {len(in_flight)} 个进行中的验证。")
+        # 取消后不等待进行中的请求，它们在守护线程中，最迟在超时后自行结束，也不会阻止程序退出
+        executor.shutdown(wait=not stopped, cancel_futures=True)
+
+    results = {SUCCEEDED: new_id_array(), FAILED: new_id_array(), PENDING: new_id_array()}
+    for entry_id, state in enumerate(status):
+        if state:
+            results[state].append(entry_id)
+    for entry_id in results[PENDING]:
+        store.reasons[entry_id] = UNCHECKED_REASON
+    return results[SUCCEEDED], results[FAILED], results[PENDING]
@@ -0,0 +1,82 @@
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# 与 benchmarks 相同，直接从仓库根目录导入 copyreading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class SubscriptionHandler(BaseHTTPRequestHandler):
+    """/ok 返回 200，/slow 等待 0.2 秒后返回 200，/forbidden 返回 403，其余返回 404"""
+
+    def do_HEAD(self):
+        if self.path.startswith('/slow'):
+            time.sleep(0.2)
+            self.send_response(200)
+        elif self.path.startswith('/ok'):
+            self.send_response(200)
+        elif self.path.startswith('/forbidden'):
+            self.send_response(403)
+        else:
+            self.send_response(404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    do_GET = do_HEAD
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_server():
+    """本地订阅服务器，返回形如 http://127.0.0.1:端口 的地址"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SubscriptionHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def silent_server():
+    """接受连接但从不回应的服务器，用于测试取消，返回地址"""
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(16)
+    connections = []
+
+    def accept():
+        while True:
+            try:
+                connections.append(listener.accept()[0])
+            except OSError:
+                return
+
+    threading.Thread(target=accept, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{listener.getsockname()[1]}"
+    finally:
+        listener.close()
+        for connection in connections:
+            connection.close()
+
+
+@pytest.fixture(params=['json', 'orjson'])
+def json_backend(request):
+    """依次以标准库和 orjson 作为 jsonio 后端运行，结束后恢复自动选择的后端"""
+    from copyreading import jsonio
+
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+    jsonio.set_backend(request.param)
+    yield request.param
+    jsonio.set_backend()
@@ -0,0 +1,32 @@
+import pytest
+
+from copyreading.cli import build_parser, parse_args
+
+
+@pytest.mark.parametrize('argv', [
+    ['--compress', 'gzip'],
+    ['--results-format', 'json', '--compress', 'zstd'],
+    ['--bundle', 'groups.jsonl', '--shard-size', '2'],
+    ['--shard-size', '0'],
+])
+def test_parse_args_rejects_ignored_combinations(argv):
+    with pytest.raises(SystemExit):
+        parse_args(build_parser('test'), argv)
+
+
+@pytest.mark.parametrize('argv', [
+    ['--results-format', 'jsonl', '--compress', 'gzip'],
+    ['--bundle', 'groups.jsonl', '--compress', 'zstd'],
+    ['--shard-size', '2'],
+])
+def test_parse_args_accepts_effective_combinations(argv):
+    parse_args(build_parser('test'), argv)
+
+
+def test_parser_without_results_rejects_results_flags():
+    parser = build_parser('test', results=False)
+    with pytest.raises(SystemExit):
+        parse_args(parser, ['--results-format', 'jsonl'])
+    with pytest.raises(SystemExit):
+        parse_args(parser, ['--compress', 'gzip'])
+    assert parse_args(parser, ['--bundle', 'groups.jsonl', '--compress', 'gzip']).compress == 'gzip'
@@ -0,0 +1,80 @@
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('requests')
+pytest.importorskip('socks')
+
+from copyreading import EntryStore  # noqa: E402
+from copyreading.distributed import JobBoard, run_coordinator  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def test_board_finishes_after_worker_expires():
+    board = JobBoard({1: ('a', 'https://a.example.com')}, expected_workers=2, lease_timeout=60)
+    board.register('w1')
+    board.register('w2')
+    assert board.take('w1') == [(1, 'a', 'https://a.example.com')]
+    board.report('w1', [], [(1, '状态码: 404')], [])
+    assert not board.finished()
+    # w2 离线后只剩 w1，它已经尝试过，不应再等 w2
+    board.workers['w2'] -= 120
+    assert board.finished()
+    assert board.take('w1') is None
+
+
+def test_board_starts_after_connect_timeout():
+    board = JobBoard({1: ('a', 'https://a.example.com')}, expected_workers=3, connect_timeout=0)
+    board.register('w1')
+    assert board.take('w1') == [(1, 'a', 'https://a.example.com')]
+    board.report('w1', [1], [], [])
+    assert board.finished()
+
+
+def test_board_without_workers_gives_up_after_connect_timeout():
+    board = JobBoard({1: ('a', 'https://a.example.com')}, expected_workers=1, connect_timeout=0)
+    assert board.finished()
+
+
+# 协调端的监听线程结束时不能抛出 SystemExit
+@pytest.mark.filterwarnings('error::pytest.PytestUnhandledThreadExceptionWarning')
+def test_coordinator_finishes_when_local_worker_is_killed(http_server):
+    address = ('127.0.0.1', free_port())
+    store = EntryStore()
+    ids = store.extend([{'name': f"slow{i}", 'url': f"{http_server}/slow/{i}"} for i in range(40)]
+                       + [{'name': 'missing', 'url': f"{http_server}/missing"}])
+    result = {}
+
+    def coordinate():
+        result['ids'] = run_coordinator(
+            store, ids, address, b'test', expected_workers=2, local_workers=2,
+            batch_size=4, num_threads=2, connect_timeout=10, lease_timeout=2,
+        )
+
+    thread = threading.Thread(target=coordinate, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while len(multiprocessing.active_children()) < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    # 等两个验证端都领取到条目后再结束其中一个，它领取的批次要靠租约过期重新排队
+    time.sleep(1)
+    os.kill(multiprocessing.active_children()[0].pid, signal.SIGKILL)
+
+    thread.join(timeout=60)
+    assert not thread.is_alive()
+    final_ids, failed_ids, unchecked_ids = result['ids']
+    assert sorted(store.entry(i)['name'] for i in final_ids) == sorted(f"slow{i}" for i in range(40))
+    assert [store.entry(i)['name'] for i in failed_ids] == ['missing']
+    assert list(unchecked_ids) == []
+    with pytest.raises(ConnectionRefusedError):
+        socket.create_connection(address, timeout=1)
@@ -0,0 +1,33 @@
+import json
+
+from copyreading import GroupIdAllocator
+
+
+def write_pm(directory, groups):
+    (directory / 'pm.json').write_text(json.dumps({'groups': groups}), encoding='utf-8')
+
+
+def test_next_free_after_max_registered(tmp_path):
+    write_pm(tmp_path, [0, 1, 5])
+    allocator = GroupIdAllocator.load(str(tmp_path))
+    assert allocator.next_free() == 6
+    assert allocator.gaps() == [(2, 5)]
+    assert [allocator.allocate() for _ in range(3)] == [6, 7, 8]
+
+
+def test_orphan_and_sharded_files_are_never_reused(tmp_path):
+    write_pm(tmp_path, [0, 1])
+    (tmp_path / '7.json').write_text('{}', encoding='utf-8')
+    (tmp_path / 'shard_0001').mkdir()
+    (tmp_path / 'shard_0001' / '12.json').write_text('{}', encoding='utf-8')
+    allocator = GroupIdAllocator.load(str(tmp_path))
+    assert sorted(allocator.orphan_ids) == [7, 12]
+    assert allocator.is_used(7) and allocator.is_used(12) and not allocator.is_used(3)
+    assert allocator.next_free() == 13
+    assert list(allocator.reserve(3, reuse_gaps=True)) == [2, 3, 4]
+
+
+def test_required_pm_json(tmp_path, capsys):
+    assert GroupIdAllocator.load(str(tmp_path), required=True) is None
+    assert "未找到 pm.json" in capsys.readouterr().out
+    assert GroupIdAllocator.load(str(tmp_path)).next_free() == 0
@@ -0,0 +1,74 @@
+import io
+import json
+import math
+
+import pytest
+
+from copyreading import jsonio
+
+SAMPLE = {
+    'name': '机场 📋',
+    'url': 'https://a.example.com/s?token=1&a="b"',
+    'id': 4,
+    'info': '第一行\n第二行',
+    'nested': [{'archive': False, 'lastup': 0}, [], {}, None, 1.5],
+}
+
+
+@pytest.mark.parametrize('indent', [None, 1, 2, 3, 4, 8])
+def test_dumps_matches_json(json_backend, indent):
+    assert jsonio.dumps(SAMPLE, indent=indent) == json.dumps(SAMPLE, ensure_ascii=False, indent=indent)
+
+
+def test_dumps_compact_matches_json(json_backend):
+    assert jsonio.dumps(SAMPLE, compact=True) == json.dumps(SAMPLE, ensure_ascii=False, separators=(',', ':'))
+
+
+@pytest.mark.parametrize('obj', [
+    {'id': 2 ** 64 + 1},
+    {'id': -2 ** 70},
+    {1: 'a', 2: ['b']},
+    {None: 1, True: 2, 1.5: 3},
+])
+@pytest.mark.parametrize('indent', [None, 4])
+def test_dumps_falls_back_for_unsupported_values(json_backend, obj, indent):
+    # orjson 不支持的整数和键交给标准库，输出仍与 json.dumps 相同
+    assert jsonio.dumps(obj, indent=indent) == json.dumps(obj, ensure_ascii=False, indent=indent)
+    assert jsonio.dumps(obj, compact=True) == json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+@pytest.mark.parametrize('data', ['NaN', b'[Infinity, -Infinity]', '{"a": NaN}'])
+def test_loads_falls_back_for_nan_literals(json_backend, data):
+    assert repr(jsonio.loads(data)) == repr(json.loads(data))
+
+
+def test_loads_matches_json(json_backend):
+    text = json.dumps(SAMPLE, ensure_ascii=False, indent=4)
+    assert jsonio.loads(text) == SAMPLE
+    assert jsonio.loads(text.encode('utf-8')) == SAMPLE
+    assert jsonio.load(io.StringIO(text)) == SAMPLE
+    assert math.isnan(jsonio.loads('NaN'))
+    with pytest.raises(json.JSONDecodeError):
+        jsonio.loads('{"a": ')
+
+
+def test_dump_and_load_path(json_backend, tmp_path):
+    path = tmp_path / 'pm.json'
+    with open(path, 'w', encoding='utf-8') as f:
+        jsonio.dump(SAMPLE, f, indent=4)
+    assert path.read_text(encoding='utf-8') == json.dumps(SAMPLE, ensure_ascii=False, indent=4)
+    assert jsonio.load_path(str(path)) == SAMPLE
+
+
+def test_backend_env_forces_json(monkeypatch):
+    monkeypatch.setenv(jsonio.BACKEND_ENV, 'json')
+    try:
+        assert jsonio.set_backend() == 'json'
+        assert jsonio.get_backend() == 'json'
+        assert jsonio.dumps({'id': 1}, compact=True) == '{"id":1}'
+        monkeypatch.setenv(jsonio.BACKEND_ENV, 'simplejson')
+        with pytest.raises(ValueError):
+            jsonio.set_backend()
+    finally:
+        monkeypatch.delenv(jsonio.BACKEND_ENV)
+        jsonio.set_backend()
@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+from copyreading import run_pipeline
+
+yaml = pytest.importorskip('yaml')
+
+
+def write_sources(tmp_path):
+    (tmp_path / 'subscribes.yaml').write_text(
+        "- name: old.example.com\n  url: https://old.example.com/s\n", encoding='utf-8')
+    (tmp_path / 'input.txt').write_text(
+        "📋 机场名称: 新名称\n🔗 订阅链接: https://old.example.com/s\n"
+        "📋 机场名称: 新机场\n🔗 订阅链接: https://new.example.com/s\n",
+        encoding='utf-8',
+    )
+
+
+def validate_all(validated):
+    def validator(store, ids):
+        validated.extend(store.entry(i)['url'] for i in ids)
+        return ids, [], []
+    return validator
+
+
+def test_singbox_existing_url_is_renamed_without_validation(tmp_path):
+    write_sources(tmp_path)
+    validated = []
+    run_pipeline('singbox', directory=str(tmp_path), suffixes=('.txt',), validator=validate_all(validated),
+                 sink_options={'full_record': False})
+    assert validated == ['https://new.example.com/s']
+    with open(tmp_path / 'subscribes.yaml', encoding='utf-8') as f:
+        records = yaml.safe_load(f)
+    assert records == [
+        {'name': '新名称', 'url': 'https://old.example.com/s'},
+        {'name': '新机场', 'url': 'https://new.example.com/s'},
+    ]
+    # suc.jpg 只记录本次验证的新订阅
+    assert 'old.example.com' not in (tmp_path / 'suc.jpg').read_text(encoding='utf-8')
+
+
+def test_singbox_rename_only(tmp_path):
+    (tmp_path / 'subscribes.yaml').write_text(
+        "- name: old.example.com\n  url: https://old.example.com/s\n", encoding='utf-8')
+    (tmp_path / 'input.txt').write_text("📋 机场名称: 新名称\n🔗 订阅链接: https://old.example.com/s\n",
+                                        encoding='utf-8')
+    validated = []
+    run_pipeline('singbox', directory=str(tmp_path), suffixes=('.txt',), validator=validate_all(validated))
+    assert validated == []
+    with open(tmp_path / 'subscribes.yaml', encoding='utf-8') as f:
+        assert yaml.safe_load(f)[0]['name'] == '新名称'
+
+
+def test_nekobox_still_excludes_existing_urls(tmp_path):
+    (tmp_path / 'pm.json').write_text('{"groups": [0, 1]}', encoding='utf-8')
+    (tmp_path / '1.json').write_text('{"id": 1, "name": "旧", "url": "https://old.example.com/s"}', encoding='utf-8')
+    write_sources(tmp_path)
+    validated = []
+    run_pipeline('nekobox', directory=str(tmp_path), suffixes=('.txt',), validator=validate_all(validated))
+    assert validated == ['https://new.example.com/s']
+
+
+@pytest.mark.parametrize('file_name', ['a.txt', 'z.txt'])
+def test_singbox_target_file_is_not_read_as_input(tmp_path, file_name, capsys):
+    # 使用默认后缀时 subscribes.yaml 也符合 YAML 输入的后缀，不能被当作输入读回来
+    (tmp_path / 'subscribes.yaml').write_text("- name: Old\n  url: https://old.example.com/s\n", encoding='utf-8')
+    (tmp_path / file_name).write_text("📋 机场名称: 新名称\n🔗 订阅链接: https://old.example.com/s\n",
+                                      encoding='utf-8')
+    run_pipeline('singbox', directory=str(tmp_path), sink_options={'full_record': False})
+    with open(tmp_path / 'subscribes.yaml', encoding='utf-8') as f:
+        assert yaml.safe_load(f) == [{'name': '新名称', 'url': 'https://old.example.com/s'}]
+    assert "更新 1 个" in capsys.readouterr().out
+
+    # 再次运行没有任何变化，不重写文件
+    os.utime(tmp_path / 'subscribes.yaml', (0, 0))
+    run_pipeline('singbox', directory=str(tmp_path), sink_options={'full_record': False})
+    assert os.path.getmtime(tmp_path / 'subscribes.yaml') == 0
+
+
+def test_singbox_file_is_parsed_once(tmp_path, monkeypatch):
+    from copyreading import pipeline, singbox
+
+    write_sources(tmp_path)
+    calls = []
+    real_load = singbox.load_subscribes
+
+    def counting_load(path):
+        calls.append(path)
+        return real_load(path)
+
+    monkeypatch.setattr(singbox, 'load_subscribes', counting_load)
+    monkeypatch.setattr(pipeline, 'load_subscribes', counting_load)
+    run_pipeline('singbox', directory=str(tmp_path), validator=validate_all([]))
+    assert len(calls) == 1
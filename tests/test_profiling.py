@@ -0,0 +1,67 @@
+import pstats
+import threading
+import time
+
+from copyreading.profiling import StageProfiler, profile_stage
+
+
+def validate_in_thread():
+    return sum(range(1000))
+
+
+def profiled_functions(path):
+    return {func_name for _, _, func_name in pstats.Stats(str(path)).stats}
+
+
+def test_stage_writes_profile_and_allocations(tmp_path):
+    profiler = StageProfiler(str(tmp_path), mode='all')
+    with profiler.stage('dedup'):
+        data = [bytearray(1024) for _ in range(100)]
+    del data
+    assert 'validate_in_thread' not in profiled_functions(tmp_path / 'dedup.prof')
+    allocations = (tmp_path / 'dedup.alloc.txt').read_text(encoding='utf-8')
+    assert 'test_profiling.py' in allocations
+    assert profiler.stages['dedup'][1] >= 100 * 1024
+
+
+def test_stage_records_threads_started_inside_it(tmp_path):
+    # 3.12 之前靠 threading.setprofile 为验证线程各启用一个 cProfile
+    profiler = StageProfiler(str(tmp_path), mode='cpu')
+    with profiler.stage('validation'):
+        thread = threading.Thread(target=validate_in_thread)
+        thread.start()
+        thread.join()
+    assert 'validate_in_thread' in profiled_functions(tmp_path / 'validation.prof')
+    assert threading.getprofile() is None
+    assert not (tmp_path / 'validation.alloc.txt').exists()
+
+
+def test_report_ranks_stages_by_time_and_memory(tmp_path, capsys):
+    profiler = StageProfiler(str(tmp_path), mode='memory')
+    with profiler.stage('dedup'):
+        data = bytearray(4 * 1024 * 1024)
+    del data
+    with profiler.stage('writers'):
+        time.sleep(0.05)
+    with profiler.stage('writers'):
+        time.sleep(0.05)
+    profiler.report()
+    lines = capsys.readouterr().out.splitlines()
+
+    by_time = lines.index('按耗时排序：')
+    by_memory = lines.index('按内存峰值（相对阶段开始时）排序：')
+    assert [line.split('：')[0].strip() for line in lines[by_time + 1:by_memory]] == ['写入', '去重']
+    assert [line.split('：')[0].strip() for line in lines[by_memory + 1:by_memory + 3]] == ['去重', '写入']
+    assert profiler.stages['writers'][0] >= 0.1
+    assert not (tmp_path / 'dedup.prof').exists()
+
+
+def test_time_mode_writes_no_files(tmp_path):
+    output_dir = tmp_path / 'profile'
+    profiler = StageProfiler(str(output_dir), mode='time')
+    with profile_stage(profiler, 'extraction'):
+        pass
+    with profile_stage(None, 'extraction'):
+        pass
+    assert not output_dir.exists()
+    assert list(profiler.stages) == ['extraction']
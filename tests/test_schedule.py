@@ -0,0 +1,116 @@
+import json
+import random
+from collections import defaultdict
+
+from copyreading import EntryStore
+from copyreading.schedule import (
+    IP_HOST_PENALTY, LABEL_BONUS, domain_reputation, load_host_history, prioritize, score_entry, update_host_history,
+)
+from copyreading.store import new_id_array
+
+
+def make_store(*pairs):
+    store = EntryStore()
+    ids = store.extend({'name': name, 'url': url} for name, url in pairs)
+    return store, ids
+
+
+def names(store, ids):
+    return [store.names[i] for i in ids]
+
+
+def test_score_entry_uses_history_reputation_label_and_ip():
+    store, ids = make_store(
+        ('a.example.com', 'https://a.example.com/s'),
+        ('机场', 'https://new.example.com/s'),
+        ('1.2.3.4:8080', 'http://1.2.3.4:8080/s'),
+        ('unknown.org', 'https://unknown.org/s'),
+    )
+    history = {'a.example.com': [3, 1], 'b.example.com': [0, 2]}
+    reputation = {'example.com': [3, 3]}
+    scores = [score_entry(store, i, history, reputation) for i in ids]
+    assert scores[0] == (3 + 1) / (4 + 2)
+    # 新子域名取上级域名的信誉，并且带标签
+    assert scores[1] == (3 + 1) / (6 + 2) + LABEL_BONUS
+    assert scores[2] == 0.5 - IP_HOST_PENALTY
+    assert scores[3] == 0.5
+
+
+def test_prioritize_interleaves_hosts_by_round():
+    store, ids = make_store(
+        ('a.example.com', 'https://a.example.com/1'),
+        ('a.example.com', 'https://a.example.com/2'),
+        ('a.example.com', 'https://a.example.com/3'),
+        ('b.example.org', 'https://b.example.org/1'),
+        ('B2', 'https://b.example.org/2'),
+        ('c.example.net', 'https://c.example.net/1'),
+    )
+    history = {'c.example.net': [5, 0]}
+    ordered = prioritize(store, ids, history=history)
+    assert ordered.typecode == ids.typecode
+    # 第一轮：c 的历史最好，b 带标签的条目排在 b 内第一个且高于 a；之后每轮每个主机一个
+    assert names(store, ordered) == [
+        'c.example.net', 'B2', 'a.example.com', 'a.example.com', 'b.example.org', 'a.example.com',
+    ]
+    # 同分时按主机首次出现的顺序，同一主机内保持原顺序
+    assert [store.urls[i] for i in ordered][2:] == [
+        'https://a.example.com/1', 'https://a.example.com/2', 'https://b.example.org/1', 'https://a.example.com/3',
+    ]
+
+
+def reference_prioritize(store, ids, history):
+    """改为数组之前的实现：每个条目一个 (分数, id) 元组"""
+    reputation = domain_reputation(history)
+    by_host = defaultdict(list)
+    for entry_id in ids:
+        by_host[store.hosts[entry_id]].append((score_entry(store, entry_id, history, reputation), entry_id))
+    for entries in by_host.values():
+        entries.sort(key=lambda item: -item[0])
+    ordered = []
+    round_index = 0
+    queues = list(by_host.values())
+    while queues:
+        current_round = [entries[round_index] for entries in queues]
+        current_round.sort(key=lambda item: -item[0])
+        ordered.extend(entry_id for _, entry_id in current_round)
+        round_index += 1
+        queues = [entries for entries in queues if len(entries) > round_index]
+    return ordered
+
+
+def test_prioritize_matches_reference_order():
+    rng = random.Random(0)
+    hosts = [f"h{i}.example{i % 3}.com" for i in range(12)] + ['10.0.0.1', '10.0.0.2:8443']
+    pairs = []
+    for i in range(500):
+        host = rng.choice(hosts)
+        name = host if rng.random() < 0.5 else f"机场{i % 7}"
+        pairs.append((name, f"https://{host}/s/{i}"))
+    store, ids = make_store(*pairs)
+    history = {host: [rng.randint(0, 5), rng.randint(0, 5)] for host in rng.sample(hosts, 6)}
+    shuffled = new_id_array(rng.sample(list(ids), len(ids)))
+    assert list(prioritize(store, shuffled, history=history)) == reference_prioritize(store, shuffled, history)
+
+
+def test_prioritize_empty():
+    store = EntryStore()
+    assert list(prioritize(store, store.extend([]), history={})) == []
+
+
+def test_host_history_round_trip(tmp_path):
+    store, ids = make_store(
+        ('a', 'https://a.example.com/1'),
+        ('a', 'https://a.example.com/2'),
+        ('b', 'https://b.example.com/1'),
+    )
+    directory = str(tmp_path)
+    assert load_host_history(directory) == {}
+    update_host_history(store, ids[:2], ids[2:], directory=directory)
+    assert load_host_history(directory) == {'a.example.com': [2, 0], 'b.example.com': [0, 1]}
+    # 再次验证时在已有记录上累加
+    update_host_history(store, ids[2:], ids[:1], directory=directory)
+    assert load_host_history(directory) == {'a.example.com': [2, 1], 'b.example.com': [1, 1]}
+
+    # 格式不正确的记录被忽略
+    (tmp_path / 'host_history.json').write_text(json.dumps({'a.example.com': [1], 'c': [1, 2]}), encoding='utf-8')
+    assert load_host_history(directory) == {'c': [1, 2]}
@@ -0,0 +1,201 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from copyreading import (EntryStore, GroupIdAllocator, open_output, write_nekobox_json, write_results,
+                         write_singbox_yaml)
+
+yaml = pytest.importorskip('yaml')
+
+
+def entries(*pairs):
+    return [{'name': name, 'url': url} for name, url in pairs]
+
+
+def test_write_nekobox_json_files_and_pm(tmp_path, json_backend):
+    (tmp_path / 'pm.json').write_text('{"groups": [0, 3], "other": "保留"}', encoding='utf-8')
+    new_ids = write_nekobox_json(
+        entries(('机场', 'https://a.example.com/x'), ('机场', 'https://b.example.com/y')),
+        directory=str(tmp_path),
+    )
+    assert new_ids == [4, 5]
+
+    expected = {
+        "archive": False,
+        "front_proxy_id": -1,
+        "id": 4,
+        "info": "",
+        "landing_proxy_id": -1,
+        "lastup": 0,
+        "manually_column_width": False,
+        "name": "机场",
+        "skip_auto_update": False,
+        "url": "https://a.example.com/x",
+    }
+    # 与原脚本 json.dump(indent=4, ensure_ascii=False) 的输出逐字节相同
+    assert (tmp_path / '4.json').read_text(encoding='utf-8') == json.dumps(expected, ensure_ascii=False, indent=4)
+    assert json.loads((tmp_path / '5.json').read_text(encoding='utf-8'))['name'] == '机场 (1)'
+
+    pm_text = (tmp_path / 'pm.json').read_text(encoding='utf-8')
+    assert pm_text == json.dumps({'groups': [0, 3, 4, 5], 'other': '保留'}, ensure_ascii=False, indent=4)
+
+
+def test_write_nekobox_json_shards_and_skips_orphans(tmp_path):
+    (tmp_path / 'pm.json').write_text('{"groups": [0]}', encoding='utf-8')
+    (tmp_path / '1.json').write_text('{"keep": true}', encoding='utf-8')
+    allocator = GroupIdAllocator.load(str(tmp_path))
+    new_ids = write_nekobox_json(entries(('A', 'https://a.example.com/x')), directory=str(tmp_path),
+                                 allocator=allocator, shard_size=2)
+    assert new_ids == [2]
+    assert (tmp_path / 'shard_0001' / '2.json').exists()
+    assert (tmp_path / '1.json').read_text(encoding='utf-8') == '{"keep": true}'
+
+
+def test_write_nekobox_json_bundle_leaves_pm(tmp_path):
+    (tmp_path / 'pm.json').write_text('{"groups": [0]}', encoding='utf-8')
+    bundle = tmp_path / 'groups.jsonl'
+    write_nekobox_json(entries(('A', 'https://a.example.com/x')), directory=str(tmp_path), bundle=str(bundle))
+    assert [json.loads(line)['id'] for line in bundle.read_text(encoding='utf-8').splitlines()] == [1]
+    assert (tmp_path / 'pm.json').read_text(encoding='utf-8') == '{"groups": [0]}'
+
+
+def test_write_results_json_array(tmp_path, json_backend):
+    store = EntryStore()
+    ids = store.extend(entries(('A', 'https://a.example.com/x'), ('B', 'https://b.example.com/y')))
+    write_results(store, ids[:1], ids[1:], str(tmp_path))
+    suc = (tmp_path / 'suc.jpg').read_text(encoding='utf-8')
+    assert suc == json.dumps(entries(('A', 'https://a.example.com/x')), ensure_ascii=False, indent=4)
+    assert json.loads((tmp_path / 'fa.jpg').read_text(encoding='utf-8')) == entries(('B', 'https://b.example.com/y'))
+    write_results(store, [], None, str(tmp_path))
+    assert (tmp_path / 'suc.jpg').read_text(encoding='utf-8') == '[]'
+
+
+def test_write_results_removes_stale_unchecked(tmp_path):
+    store = EntryStore()
+    ids = store.extend(entries(('A', 'https://a.example.com/x'), ('B', 'https://b.example.com/y')))
+    write_results(store, ids[:1], [], str(tmp_path), unchecked_ids=ids[1:])
+    assert json.loads((tmp_path / 'unchecked.jpg').read_text(encoding='utf-8')) == entries(('B', 'https://b.example.com/y'))
+    (tmp_path / 'unchecked.jsonl.gz').write_bytes(gzip.compress(b''))
+
+    # 未验证的结果只在本次有未完成的条目时存在；不验证时（None）保留原文件
+    write_results(store, ids, [], str(tmp_path), unchecked_ids=None)
+    assert (tmp_path / 'unchecked.jpg').exists()
+    write_results(store, ids, [], str(tmp_path), unchecked_ids=ids[:0])
+    assert not (tmp_path / 'unchecked.jpg').exists()
+    assert not (tmp_path / 'unchecked.jsonl.gz').exists()
+
+
+def test_write_results_jsonl(tmp_path, json_backend):
+    store = EntryStore()
+    ids = store.extend(entries(('机场', 'https://a.example.com/x'), ('B', 'https://b.example.com/y')))
+    write_results(store, ids[:1], ids[1:], str(tmp_path), results_format='jsonl')
+    assert (tmp_path / 'suc.jsonl').read_text(encoding='utf-8') == '{"name":"机场","url":"https://a.example.com/x"}\n'
+    assert (tmp_path / 'fa.jsonl').read_text(encoding='utf-8') == '{"name":"B","url":"https://b.example.com/y"}\n'
+    assert not (tmp_path / 'suc.jpg').exists()
+
+
+@pytest.mark.parametrize('compress, suffix', [('gzip', '.gz'), ('zstd', '.zst')])
+def test_write_results_compressed_jsonl(tmp_path, compress, suffix):
+    if compress == 'zstd':
+        zstandard = pytest.importorskip('zstandard')
+    store = EntryStore()
+    ids = store.extend(entries(('机场', 'https://a.example.com/x'), ('B', 'https://b.example.com/y')))
+    write_results(store, ids, [], str(tmp_path), results_format='jsonl', compress=compress)
+    data = (tmp_path / f"suc.jsonl{suffix}").read_bytes()
+    if compress == 'gzip':
+        text = gzip.decompress(data)
+    else:
+        text = zstandard.ZstdDecompressor().stream_reader(data).read()
+    assert [json.loads(line) for line in text.decode('utf-8').splitlines()] == [store.entry(i) for i in ids]
+    assert (tmp_path / f"fa.jsonl{suffix}").exists()
+    assert not (tmp_path / 'suc.jsonl').exists()
+
+
+def test_open_output_appends_suffix(tmp_path):
+    path = str(tmp_path / 'out.jsonl')
+    f, file_name = open_output(path, 'gzip')
+    with f:
+        f.write('机场\n')
+    assert file_name == path + '.gz'
+    assert gzip.decompress((tmp_path / 'out.jsonl.gz').read_bytes()).decode('utf-8') == '机场\n'
+    f, file_name = open_output(path)
+    f.close()
+    assert file_name == path
+
+
+def load_yaml(path):
+    with open(path, encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def test_write_singbox_yaml_merge(tmp_path):
+    path = tmp_path / 'subscribes.yaml'
+    path.write_text(
+        "- name: Old\n  url: https://old.example.com/s\n"
+        "- id: ID_keep\n  name: Foo\n  url: https://foo.example.com/s\n  path: data/subscribes/Foo.json\n",
+        encoding='utf-8',
+    )
+    write_singbox_yaml(entries(('Foo', 'https://new.example.com/s'), ('Renamed', 'https://old.example.com/s')),
+                       directory=str(tmp_path))
+    records = load_yaml(path)
+    assert [record['url'] for record in records] == [
+        'https://old.example.com/s', 'https://foo.example.com/s', 'https://new.example.com/s',
+    ]
+    old, foo, new = records
+    # 已有记录：更新名称、补全缺少的字段，已有的 id 和 path 不变
+    assert old['name'] == 'Renamed' and old['id'].startswith('ID_') and old['type'] == 'Http'
+    assert foo['id'] == 'ID_keep' and foo['path'] == 'data/subscribes/Foo.json'
+    # 新记录与已有记录重名时 path 追加编号
+    assert new['name'] == 'Foo' and new['path'] == 'data/subscribes/Foo (1).json'
+    assert len({record['id'] for record in records}) == 3
+
+
+def test_write_singbox_yaml_unchanged_is_not_rewritten(tmp_path, capsys):
+    write_singbox_yaml(entries(('A', 'https://a.example.com/x')), directory=str(tmp_path))
+    path = tmp_path / 'subscribes.yaml'
+    os.utime(path, (0, 0))
+    # 裸链接的主机名不覆盖已有名称
+    write_singbox_yaml(entries(('a.example.com', 'https://a.example.com/x')), directory=str(tmp_path))
+    assert "没有需要更新的订阅" in capsys.readouterr().out
+    assert os.stat(path).st_mtime == 0
+
+
+def test_write_singbox_yaml_simple_records(tmp_path):
+    write_singbox_yaml(entries(('A', 'https://a.example.com/x')), directory=str(tmp_path), full_record=False)
+    assert load_yaml(tmp_path / 'subscribes.yaml') == {'proxies': entries(('A', 'https://a.example.com/x'))}
+
+
+def test_write_singbox_yaml_reassigns_only_clashing_field(tmp_path):
+    path = tmp_path / 'subscribes.yaml'
+    path.write_text(
+        "- id: ID_a\n  name: A\n  url: https://a.example.com/s\n  path: data/subscribes/A.json\n"
+        "- id: ID_a\n  name: B\n  url: https://b.example.com/s\n  path: data/subscribes/B.json\n"
+        "- id: ID_c\n  name: C\n  url: https://c.example.com/s\n  path: data/subscribes/A.json\n",
+        encoding='utf-8',
+    )
+    write_singbox_yaml([], directory=str(tmp_path))
+    a, b, c = load_yaml(path)
+    assert a['id'] == 'ID_a' and a['path'] == 'data/subscribes/A.json'
+    # 只有 id 重复：换新 id，path 不变
+    assert b['id'] not in ('ID_a', 'ID_c') and b['path'] == 'data/subscribes/B.json'
+    # 只有 path 重复：换新 path，id 不变
+    assert c['id'] == 'ID_c' and c['path'] == 'data/subscribes/C.json'
+
+
+@pytest.mark.parametrize('full_record', [True, False])
+def test_write_singbox_yaml_appends_new_records(tmp_path, monkeypatch, full_record):
+    write_singbox_yaml(entries(('A', 'https://a.example.com/s')), directory=str(tmp_path), full_record=full_record)
+    dumped = []
+    real_dump = yaml.dump
+    monkeypatch.setattr(yaml, 'dump', lambda data, *args, **kwargs: dumped.append(data) or real_dump(data, *args, **kwargs))
+    write_singbox_yaml(entries(('B', 'https://b.example.com/s'), ('C', 'https://c.example.com/s')),
+                       directory=str(tmp_path), full_record=full_record)
+    # 只序列化了新增的两条记录，文件内容与整体重新写出相同
+    assert [[record['name'] for record in data] for data in dumped] == [['B', 'C']]
+    data = load_yaml(tmp_path / 'subscribes.yaml')
+    expected = real_dump(data, allow_unicode=True, indent=2, sort_keys=False)
+    assert (tmp_path / 'subscribes.yaml').read_text(encoding='utf-8') == expected
+    records = data if full_record else data['proxies']
+    assert [record['name'] for record in records] == ['A', 'B', 'C']
@@ -0,0 +1,186 @@
+import base64
+import gzip
+import io
+import json
+import random
+import zipfile
+
+import pytest
+
+from copyreading import iter_subscriptions, parse_txt_content
+from copyreading import sources
+from copyreading.sources import TXT_PATTERN, iter_stream_entries, read_csv
+
+
+def read_named(file_name, data):
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return list(iter_stream_entries(file_name, io.BytesIO(data)))
+
+
+def test_parse_txt_emoji_and_plain_pairs():
+    content = (
+        "📋 机场名称: A\n🔗 订阅链接: https://a.example.com/x\n\n"
+        "机场名称: B \n订阅链接: https://b.example.com/y \n"
+    )
+    assert list(parse_txt_content(content)) == [
+        {'name': 'A', 'url': 'https://a.example.com/x'},
+        {'name': 'B', 'url': 'https://b.example.com/y'},
+    ]
+
+
+def test_parse_txt_mixed_formats_in_one_file():
+    content = (
+        "说明文字\n"
+        "📋 机场名称: A\n🔗 订阅链接: https://a.example.com/x\n"
+        "https://c.example.com/sub?token=1 和 http://d.example.org:8080/s\n"
+        "机场名称: B\n订阅链接: https://b.example.com/y\n"
+    )
+    assert list(parse_txt_content(content)) == [
+        {'name': 'A', 'url': 'https://a.example.com/x'},
+        {'name': 'c.example.com', 'url': 'https://c.example.com/sub?token=1'},
+        {'name': 'd.example.org:8080', 'url': 'http://d.example.org:8080/s'},
+        {'name': 'B', 'url': 'https://b.example.com/y'},
+    ]
+
+
+def test_parse_txt_link_emoji_requires_label_emoji():
+    # 带 🔗 的链接行不与不带 📋 的名称行配对，按裸链接处理
+    content = "机场名称: D\n🔗 订阅链接: https://d.example.com/w\n"
+    assert list(parse_txt_content(content)) == [{'name': 'd.example.com', 'url': 'https://d.example.com/w'}]
+
+
+def test_parse_txt_without_markers():
+    assert list(parse_txt_content("没有任何订阅\n\nftp://x.example.com\n")) == []
+
+
+def test_parse_txt_ignores_empty_urls():
+    assert list(parse_txt_content("访问 http:// 或 https://\n")) == []
+    assert list(parse_txt_content("https:// https://a.example.com/x\n")) == [
+        {'name': 'a.example.com', 'url': 'https://a.example.com/x'},
+    ]
+
+
+@pytest.mark.parametrize('gap', [0, 8, 10 ** 9])
+def test_parse_txt_marker_skip_matches_finditer(monkeypatch, gap):
+    # 无论按稀疏还是密集的方式查找，结果都与在每个位置运行正则相同
+    monkeypatch.setattr(sources, 'TXT_GAP', gap)
+    pieces = [
+        '📋', '🔗', ' ', '\n', '\t', '机场名称:', '订阅链接:', '机场名称', '机', 'http', 'https://', 'http://',
+        'a.example.com', '/x?y', '说明', 'ht', 'tp', ' ' * 40,
+        '📋 机场名称: A\n🔗 订阅链接: https://a.example.com/s\n', '机场名称: B\n订阅链接: http://b.example.com\n',
+    ]
+    rng = random.Random(gap)
+    for _ in range(3000):
+        content = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 20)))
+        expected = [(match.span(), match.groups()) for match in TXT_PATTERN.finditer(content)]
+        assert [(match.span(), match.groups()) for match in sources._iter_txt_matches(content)] == expected
+
+
+def test_parse_txt_skips_long_prose():
+    prose = "本频道每日更新免费节点，仅供学习交流使用。\n" * 500
+    content = prose + "📋 机场名称: A\n🔗 订阅链接: https://a.example.com/x\n" + prose + "https://b.example.com/y\n"
+    assert list(parse_txt_content(content)) == [
+        {'name': 'A', 'url': 'https://a.example.com/x'},
+        {'name': 'b.example.com', 'url': 'https://b.example.com/y'},
+    ]
+
+
+def test_read_txt():
+    assert read_named('a.txt', "机场名称: A\n订阅链接: https://a.example.com/x\n") == [
+        {'name': 'A', 'url': 'https://a.example.com/x'},
+    ]
+
+
+def test_read_json_group_file():
+    data = json.dumps({'id': 3, 'name': ' A ', 'url': ' https://a.example.com/x '})
+    assert read_named('3.json', data) == [{'name': 'A', 'url': 'https://a.example.com/x'}]
+    assert read_named('pm.json', json.dumps({'groups': [1, 2]})) == []
+
+
+def test_read_yaml_list_and_proxies():
+    listed = "- name: A\n  url: https://a.example.com/x\n- url: https://b.example.com/y\n"
+    assert read_named('subscribes.yaml', listed) == [
+        {'name': 'A', 'url': 'https://a.example.com/x'},
+        {'name': 'b.example.com', 'url': 'https://b.example.com/y'},
+    ]
+    proxies = "proxies:\n  - name: C\n    url: https://c.example.com/z\n"
+    assert read_named('x.yml', proxies) == [{'name': 'C', 'url': 'https://c.example.com/z'}]
+
+
+def test_read_jsonl_skips_bad_lines(capsys):
+    data = '{"name": "A", "url": "https://a.example.com/x"}\nnot json\n\n{"url": "https://b.example.com/y"}\n'
+    assert read_named('a.jsonl', data) == [
+        {'name': 'A', 'url': 'https://a.example.com/x'},
+        {'name': 'b.example.com', 'url': 'https://b.example.com/y'},
+    ]
+    assert "跳过了 1 行" in capsys.readouterr().out
+
+
+def test_csv_with_header():
+    entries = list(read_csv(io.StringIO("name,url\nA,https://a.example.com/sub\n,https://b.example.com/x\n")))
+    assert entries == [
+        {'name': 'A', 'url': 'https://a.example.com/sub'},
+        {'name': 'b.example.com', 'url': 'https://b.example.com/x'},
+    ]
+
+
+def test_csv_with_chinese_header():
+    entries = read_named('a.csv', "机场名称,订阅链接\nA,https://a.example.com/sub\n")
+    assert entries == [{'name': 'A', 'url': 'https://a.example.com/sub'}]
+
+
+def test_csv_without_header_detects_url_column():
+    entries = read_named('x.csv', "foo,https://a.example.com/sub\nhttps://b.example.com/x,bar\n")
+    assert entries == [
+        {'name': 'foo', 'url': 'https://a.example.com/sub'},
+        {'name': 'bar', 'url': 'https://b.example.com/x'},
+    ]
+
+
+def test_read_base64():
+    text = "机场名称: A\n订阅链接: https://a.example.com/x\n"
+    encoded = base64.b64encode(text.encode('utf-8')).decode('ascii')
+    assert read_named('a.b64', encoded[:20] + '\n' + encoded[20:]) == [{'name': 'A', 'url': 'https://a.example.com/x'}]
+
+
+def test_gzip_container():
+    data = gzip.compress("https://a.example.com/x\n".encode('utf-8'))
+    assert read_named('a.txt.gz', data) == [{'name': 'a.example.com', 'url': 'https://a.example.com/x'}]
+
+
+def test_zstd_container():
+    zstandard = pytest.importorskip('zstandard')
+    data = zstandard.ZstdCompressor().compress('{"url": "https://a.example.com/x"}\n'.encode('utf-8'))
+    assert read_named('a.jsonl.zst', data) == [{'name': 'a.example.com', 'url': 'https://a.example.com/x'}]
+
+
+def test_zip_container_dispatches_by_inner_name():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('dir/a.txt', "https://a.example.com/x\n")
+        archive.writestr('b.csv', "name,url\nB,https://b.example.com/y\n")
+        archive.writestr('readme.md', "https://ignored.example.com/\n")
+    assert read_named('bundle.zip', buffer.getvalue()) == [
+        {'name': 'a.example.com', 'url': 'https://a.example.com/x'},
+        {'name': 'B', 'url': 'https://b.example.com/y'},
+    ]
+
+
+def test_iter_subscriptions_skips_pm_and_result_files(tmp_path, capsys):
+    (tmp_path / 'a.txt').write_text("https://a.example.com/x\n", encoding='utf-8')
+    (tmp_path / 'pm.json').write_text('{"groups": [0]}', encoding='utf-8')
+    (tmp_path / 'suc.jsonl').write_text('{"url": "https://old.example.com/"}\n', encoding='utf-8')
+    assert list(iter_subscriptions(str(tmp_path))) == [{'name': 'a.example.com', 'url': 'https://a.example.com/x'}]
+    assert "识别到 TXT 文件 1 个，获取订阅 1 个。" in capsys.readouterr().out
+
+
+def test_read_txt_pairs_across_chunks(monkeypatch):
+    from copyreading import sources
+
+    monkeypatch.setattr(sources, 'TXT_CHUNK_SIZE', 8)
+    text = "说明\n机场名称: A\n订阅链接: https://a.example.com/x\nhttps://b.example.com/y\n机场名称: C\n"
+    assert read_named('a.txt', text) == [
+        {'name': 'A', 'url': 'https://a.example.com/x'},
+        {'name': 'b.example.com', 'url': 'https://b.example.com/y'},
+    ]
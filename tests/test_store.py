@@ -0,0 +1,77 @@
+from copyreading import EntryStore, get_base_domain, url_key
+from copyreading.store import KeyIndex, KeySet, url_host
+
+
+def test_add_skips_exact_duplicates():
+    store = EntryStore()
+    assert store.add('A', 'https://a.example.com/x') == 0
+    assert store.add('A', 'https://a.example.com/x') is None
+    # 同一链接换了名称不算完全重复
+    assert store.add('B', 'https://a.example.com/x') == 1
+    assert len(store) == 2
+    assert store.entry(1) == {'name': 'B', 'url': 'https://a.example.com/x'}
+
+
+def test_extend_returns_ids_of_new_entries(capsys):
+    store = EntryStore()
+    entries = [
+        {'name': 'A', 'url': 'https://a.example.com/x'},
+        {'name': 'A', 'url': 'https://a.example.com/x'},
+        {'name': 'b.example.com', 'url': 'https://b.example.com/y'},
+    ]
+    ids = store.extend(entries, verbose=True)
+    assert list(ids) == [0, 1]
+    assert list(store.iter_entries(ids)) == [entries[0], entries[2]]
+    assert "跳过完全重复条目" in capsys.readouterr().out
+    assert store.hosts[1] == 'b.example.com'
+
+
+def test_exclude_urls():
+    store = EntryStore()
+    ids = store.extend([
+        {'name': 'A', 'url': 'https://a.example.com/x'},
+        {'name': 'B', 'url': 'https://b.example.com/y'},
+        {'name': 'C', 'url': 'https://c.example.com/z'},
+    ])
+    kept = store.exclude_urls(ids, {url_key('https://b.example.com/y')})
+    assert [store.entry(i)['name'] for i in kept] == ['A', 'C']
+
+
+def test_keyset_grows_and_keeps_membership():
+    keys = KeySet(capacity=4)
+    values = [0, 2 ** 64 - 1] + [i * 0x9E3779B97F4A7C15 % 2 ** 64 for i in range(2, 1000)]
+    for value in values:
+        assert keys.add(value)
+    assert len(keys) == len(values)
+    assert all(value in keys for value in values)
+    # 0 表示空位，摘要 0 按 1 保存
+    assert 1 in keys
+    assert not keys.add(values[10])
+    assert 12345 not in keys
+
+
+def test_keyindex_numbers_keys_in_first_seen_order():
+    index = KeyIndex(capacity=4)
+    keys = [url_key(f"host{i}") for i in range(100)]
+    assert [index.index(key) for key in keys] == list(range(100))
+    assert [index.index(key) for key in reversed(keys)] == list(reversed(range(100)))
+    assert index.add(keys[0]) is False and index.add(url_key('new')) is True
+    assert len(index) == 101
+
+
+def test_names_are_stored_once_and_decoded_on_read():
+    store = EntryStore()
+    store.add('机场 🚀', 'https://a.example.com/x')
+    store.add('b.example.com:8443', 'https://b.example.com:8443/y')
+    assert store.names[0] == '机场 🚀' and store.hosts[0] == 'a.example.com'
+    # 名称就是主机名时不保存名称
+    assert store.names[1] == 'b.example.com:8443'
+    assert bytes(store._text).count(b'b.example.com') == 1
+
+
+def test_url_host_matches_get_base_domain():
+    urls = [
+        'https://a.com/x', 'http://u:p@h.com:1?x', 'http://i.com#f', 'http://[::1]:80/x', 'http://a\tb.com/',
+        'vmess://abc', 'https:///x', 'http://例子.中国/a', 'ss://YWVz@1.2.3.4:80#tag', 'a.com/x',
+    ]
+    assert [url_host(url) for url in urls] == [get_base_domain(url) for url in urls]
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+pytest.importorskip('requests')
+pytest.importorskip('socks')
+
+from copyreading import EntryStore  # noqa: E402
+from copyreading.validate import REQUEST_TIMEOUT, validate_entries  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_validate_entries_against_local_server(http_server):
+    store = EntryStore()
+    ids = store.extend([
+        {'name': 'ok', 'url': f"{http_server}/ok/1"},
+        {'name': 'missing', 'url': f"{http_server}/missing"},
+        {'name': 'forbidden', 'url': f"{http_server}/forbidden"},
+        {'name': 'ok2', 'url': f"{http_server}/ok/2"},
+    ])
+    final_ids, failed_ids, unchecked_ids = validate_entries(store, ids, num_threads=2)
+    assert [store.entry(i)['name'] for i in final_ids] == ['ok', 'forbidden', 'ok2']
+    assert [store.entry(i)['name'] for i in failed_ids] == ['missing']
+    assert store.reasons[failed_ids[0]] == "状态码: 404"
+    assert list(unchecked_ids) == []
+
+
+def test_cancel_does_not_wait_for_blocked_requests(silent_server):
+    # 在子进程中运行，连同解释器退出一起计时：卡住的请求不能拖住退出
+    script = f"""
+import sys
+import threading
+sys.path.insert(0, {ROOT!r})
+from copyreading import EntryStore
+from copyreading.cancel import CancelToken
+from copyreading.validate import validate_entries
+
+store = EntryStore()
+ids = store.extend({{'name': f'n{{i}}', 'url': f'{silent_server}/s/{{i}}'}} for i in range(4))
+token = CancelToken()
+# 模拟 Ctrl-C：没有截止时间，请求使用完整的 REQUEST_TIMEOUT
+threading.Timer(1, token.cancel).start()
+final_ids, failed_ids, unchecked_ids = validate_entries(store, ids, num_threads=2, token=token)
+print(len(final_ids), len(failed_ids), len(unchecked_ids))
+"""
+    start = time.monotonic()
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, timeout=REQUEST_TIMEOUT * 2)
+    elapsed = time.monotonic() - start
+    assert result.stdout.splitlines()[-1] == '0 0 4'
+    assert elapsed < REQUEST_TIMEOUT / 2